@@ -2,19 +2,24 @@ import os
 import requests
 import pandas as pd
 from datetime import datetime
+from core.progress import report_progress
+from core.run_control import fetch_timeout
 
 def run(config):
     url = config.get("url")
     filters = [f.strip() for f in config.get("filters", "").split(",")]
 
     try:
-        response = requests.get(url)
+        report_progress(stage="fetching", url=url)
+        response = requests.get(url, timeout=fetch_timeout(float(config.get("timeout", 30))))
         data = response.json()
 
+        report_progress(stage="normalizing")
         df = pd.json_normalize(data)
         if filters:
             df = df[filters]
 
+        report_progress(stage="writing", rows_emitted=len(df))
         out_dir = "output/api_fetcher"
         os.makedirs(out_dir, exist_ok=True)
         filename = f"{out_dir}/api_fetcher_output_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
@@ -26,4 +31,5 @@ def run(config):
         }
 
     except Exception as e:
+        report_progress(stage="error", error=str(e))
         return {"status": "❌ Failed", "error": str(e)}
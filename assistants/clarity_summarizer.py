@@ -1,2 +1,316 @@
+import os
+import re
+import glob
+import json
+import hashlib
+from collections import Counter
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from core.progress import report_progress
+from core.run_control import stop_reason
+
+# Offline summaries of assistant outputs (no external model):
+#   CSV           per-column stats (type, nulls, distinct, min/max/mean/std) and top values
+#   Markdown/text extractive summary: sentences ranked by TF-IDF term weights, computed
+#                 with NumPy over all text artifacts in the run
+# Parsed terms / column stats are cached per artifact under state/clarity_summarizer,
+# keyed by path + size + mtime, so re-summarizing a growing output folder only
+# parses what changed.
+
+TEXT_EXTENSIONS = (".md", ".txt")
+CSV_EXTENSIONS = (".csv", ".csv.gz")
+CSV_CHUNK_ROWS = 200_000
+TOP_VALUES = 5
+MAX_TRACKED_VALUES = 50_000  # per column; the tail is pruned when exceeded
+SUMMARY_SENTENCES = 3
+STOPWORDS = set("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she should
+so some such than that the their theirs them themselves then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your
+yours yourself yourselves also via per may might must shall generated
+""".split())
+TOKEN_RE = re.compile(r"[a-z][a-z0-9'\-]+")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+MARKDOWN_RE = re.compile(r"!(?=\[)|[#*_`>\[\]]|\(https?://[^)]*\)")
+CACHE_VERSION = 1
+
+
+def resolve_inputs(config):
+    """Artifact paths from input_files / input_glob / chained_input (a path, list or result dict)."""
+    found = []
+
+    def collect(value):
+        if not value:
+            return
+        if isinstance(value, dict):
+            for key in ("outputs", "output_file", "output", "summary_md", "manifest"):
+                collect(value.get(key))
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                collect(item)
+        elif isinstance(value, str):
+            if any(ch in value for ch in "*?["):
+                found.extend(sorted(glob.glob(value, recursive=True)))
+            elif os.path.isdir(value):
+                found.extend(sorted(glob.glob(os.path.join(value, "**", "*"), recursive=True)))
+            else:
+                found.append(value)
+
+    collect(config.get("input_files"))
+    collect(config.get("input_glob"))
+    collect(config.get("chained_input"))
+    paths = []
+    for path in dict.fromkeys(found):
+        if os.path.isfile(path) and path.lower().endswith(TEXT_EXTENSIONS + CSV_EXTENSIONS):
+            paths.append(path)
+    return paths
+
+
+# ---------- cache ----------
+
+def cache_path(cache_dir, path):
+    key = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=12).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def load_cached(cache_dir, path):
+    st = os.stat(path)
+    try:
+        with open(cache_path(cache_dir, path)) as f:
+            entry = json.load(f)
+        if (entry.get("version"), entry.get("size"), entry.get("mtime_ns")) == (CACHE_VERSION, st.st_size, st.st_mtime_ns):
+            return entry
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def store_cached(cache_dir, path, entry):
+    st = os.stat(path)
+    entry.update(version=CACHE_VERSION, path=path, size=st.st_size, mtime_ns=st.st_mtime_ns)
+    target = cache_path(cache_dir, path)
+    tmp = target + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp, target)
+    return entry
+
+
+# ---------- CSV stats ----------
+
+def column_stats(path, top_k=TOP_VALUES):
+    """Streams the CSV in chunks; memory is bounded by the tracked value counts."""
+    stats = {}
+    rows = 0
+    reader = pd.read_csv(path, chunksize=CSV_CHUNK_ROWS, low_memory=False)
+    for chunk in reader:
+        rows += len(chunk)
+        for col in chunk.columns:
+            s = stats.setdefault(col, {"nulls": 0, "numeric": 0, "count": 0, "sum": 0.0, "sumsq": 0.0,
+                                       "min": None, "max": None, "values": Counter(), "pruned": False})
+            series = chunk[col]
+            nulls = int(series.isna().sum())
+            s["nulls"] += nulls
+            s["count"] += len(series) - nulls
+            nums = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            nums = nums[~np.isnan(nums)]
+            if nums.size:
+                s["numeric"] += int(nums.size)
+                s["sum"] += float(nums.sum())
+                s["sumsq"] += float(np.square(nums).sum())
+                lo, hi = float(nums.min()), float(nums.max())
+                s["min"] = lo if s["min"] is None else min(s["min"], lo)
+                s["max"] = hi if s["max"] is None else max(s["max"], hi)
+            s["values"].update(series.dropna().astype(str).value_counts().to_dict())
+            if len(s["values"]) > MAX_TRACKED_VALUES:
+                s["values"] = Counter(dict(s["values"].most_common(MAX_TRACKED_VALUES // 2)))
+                s["pruned"] = True
+
+    columns = {}
+    for col, s in stats.items():
+        is_numeric = s["count"] > 0 and s["numeric"] == s["count"]
+        entry = {
+            "type": "numeric" if is_numeric else "text",
+            "non_null": s["count"],
+            "nulls": s["nulls"],
+            "distinct": len(s["values"]) if not s["pruned"] else f">{len(s['values'])}",
+            "top_values": [[v, c] for v, c in s["values"].most_common(top_k)],
+        }
+        if is_numeric:
+            mean = s["sum"] / s["numeric"]
+            entry.update(
+                min=s["min"], max=s["max"], mean=round(mean, 4),
+                std=round(float(np.sqrt(max(s["sumsq"] / s["numeric"] - mean * mean, 0.0))), 4),
+            )
+        columns[str(col)] = entry
+    return {"kind": "csv", "rows": rows, "columns": columns}
+
+
+# ---------- text ----------
+
+def split_sentences(text):
+    sentences = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("|") or set(line) <= set("-=*_ "):
+            continue  # blank lines, markdown tables and rules
+        line = MARKDOWN_RE.sub("", line).strip(" -+")
+        sentences.extend(s.strip() for s in SENTENCE_RE.split(line) if len(s.strip()) > 20)
+    return sentences
+
+
+def tokenize(sentence):
+    return [t for t in TOKEN_RE.findall(sentence.lower()) if t not in STOPWORDS and len(t) > 2]
+
+
+def parse_text(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        sentences = split_sentences(f.read())
+    return {"kind": "text", "sentences": sentences, "tokens": [tokenize(s) for s in sentences]}
+
+
+def summarize_texts(entries, n_sentences=SUMMARY_SENTENCES, n_keywords=8):
+    """Ranks each document's sentences by TF-IDF over the whole batch (vectorized with NumPy)."""
+    vocab = {}
+    doc_terms = []  # per doc: (sentence index array, term id array)
+    for entry in entries:
+        sent_idx, term_ids = [], []
+        for i, tokens in enumerate(entry["tokens"]):
+            for t in tokens:
+                sent_idx.append(i)
+                term_ids.append(vocab.setdefault(t, len(vocab)))
+        doc_terms.append((np.asarray(sent_idx, dtype=np.int64), np.asarray(term_ids, dtype=np.int64)))
+
+    n_docs = len(entries)
+    df = np.zeros(len(vocab), dtype=np.float64)
+    for _, term_ids in doc_terms:
+        if term_ids.size:
+            df[np.unique(term_ids)] += 1
+    idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+    terms = np.array(list(vocab), dtype=object)
+
+    summaries = []
+    for entry, (sent_idx, term_ids) in zip(entries, doc_terms):
+        n_sent = len(entry["sentences"])
+        if not term_ids.size:
+            summaries.append({"summary": entry["sentences"][:n_sentences], "keywords": []})
+            continue
+        # Work on the document's own terms so cost doesn't grow with the batch vocabulary
+        doc_vocab, local_ids = np.unique(term_ids, return_inverse=True)
+        doc_weight = np.log1p(np.bincount(local_ids).astype(np.float64)) * idf[doc_vocab]
+        occurrence = doc_weight[local_ids]
+        lengths = np.bincount(sent_idx, minlength=n_sent).astype(np.float64)
+        scores = np.bincount(sent_idx, weights=occurrence, minlength=n_sent) / np.sqrt(np.maximum(lengths, 1.0))
+        scores[: min(3, n_sent)] *= 1.1  # lead sentences carry a little extra weight
+
+        chosen, chosen_terms = [], []
+        for i in np.argsort(-scores, kind="stable"):
+            if len(chosen) >= n_sentences or scores[i] <= 0:
+                break
+            words = set(entry["tokens"][i])
+            # Skip near-duplicates of sentences already picked
+            if any(len(words & other) / max(len(words | other), 1) > 0.6 for other in chosen_terms):
+                continue
+            chosen.append(int(i))
+            chosen_terms.append(words)
+        top = np.argsort(-doc_weight, kind="stable")[:n_keywords]
+        summaries.append({
+            "summary": [entry["sentences"][i] for i in sorted(chosen)],
+            "keywords": [terms[doc_vocab[i]] for i in top if doc_weight[i] > 0],
+        })
+    return summaries
+
+
+# ---------- report ----------
+
+def render_markdown(results, run_id):
+    lines = [f"## Clarity Summary\nGenerated: {run_id}\n"]
+    for r in results:
+        lines.append(f"### {r['path']}")
+        if r.get("error"):
+            lines.append(f"❌ {r['error']}\n")
+        elif r["kind"] == "csv":
+            lines.append(f"{r['rows']} rows × {len(r['columns'])} columns\n")
+            lines.append("| column | type | non-null | nulls | distinct | min | max | mean | top values |")
+            lines.append("|---|---|---|---|---|---|---|---|---|")
+            for col, c in r["columns"].items():
+                top = ", ".join(f"{str(v)[:30]} ({n})" for v, n in c["top_values"])
+                lines.append(
+                    f"| {col} | {c['type']} | {c['non_null']} | {c['nulls']} | {c['distinct']} | "
+                    f"{c.get('min', '')} | {c.get('max', '')} | {c.get('mean', '')} | {top} |"
+                )
+            lines.append("")
+        else:
+            if r.get("keywords"):
+                lines.append(f"**Keywords:** {', '.join(r['keywords'])}\n")
+            lines.extend(f"- {s}" for s in r.get("summary", []))
+            lines.append("")
+    return "\n".join(lines)
+
+
 def run(config):
-    return f"🧠 Placeholder for clarity_writer"
+    paths = resolve_inputs(config)
+    if not paths:
+        return {"status": "❌ Failed", "error": "No CSV / Markdown / text inputs found"}
+
+    cache_dir = config.get("cache_dir", os.path.join("state", "clarity_summarizer"))
+    os.makedirs(cache_dir, exist_ok=True)
+    n_sentences = int(config.get("summary_sentences", SUMMARY_SENTENCES))
+    top_k = int(config.get("top_values", TOP_VALUES))
+
+    entries, cache_hits, stopped = [], 0, None
+    for n, path in enumerate(paths, 1):
+        stopped = stop_reason()
+        if stopped:
+            break
+        entry = load_cached(cache_dir, path)
+        if entry is not None and (entry["kind"] != "csv" or entry.get("top_k") == top_k):
+            cache_hits += 1
+        else:
+            try:
+                if path.lower().endswith(CSV_EXTENSIONS):
+                    entry = store_cached(cache_dir, path, {**column_stats(path, top_k), "top_k": top_k})
+                else:
+                    entry = store_cached(cache_dir, path, parse_text(path))
+            except Exception as e:
+                entry = {"kind": "error", "error": str(e)}
+        entries.append({**entry, "path": path})
+        if n % 50 == 0:
+            report_progress(stage="summarizing", pages_fetched=n, cache_hits=cache_hits)
+
+    text_entries = [e for e in entries if e["kind"] == "text"]
+    for entry, summary in zip(text_entries, summarize_texts(text_entries, n_sentences)):
+        entry.update(summary)
+
+    results = []
+    for e in entries:
+        item = {k: v for k, v in e.items() if k not in ("sentences", "tokens", "version", "size", "mtime_ns", "top_k")}
+        results.append(item)
+
+    report_progress(stage="writing", rows_emitted=len(results))
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_dir = os.path.join("output", "clarity_summarizer")
+    os.makedirs(out_dir, exist_ok=True)
+    md_file = os.path.join(out_dir, f"clarity_summary_{run_id}.md")
+    json_file = os.path.join(out_dir, f"clarity_summary_{run_id}.json")
+    with open(md_file, "w") as f:
+        f.write(render_markdown(results, run_id))
+    with open(json_file, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+
+    result = {
+        "status": "✅ Success",
+        "artifacts": len(results),
+        "cache_hits": cache_hits,
+        "output": md_file,
+        "outputs": [md_file, json_file],
+    }
+    if stopped:
+        result["status"] = f"⚠️ Stopped ({stopped}) – partial output saved"
+        result["partial"] = True
+        result["stop_reason"] = stopped
+    return result
@@ -1,2 +1,378 @@
+import os
+import re
+import csv
+import gzip
+import json
+import queue
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from core.progress import report_progress
+from core.run_control import stop_reason
+
+# Split modes:
+#   rows   every `rows_per_shard` records start a new shard
+#   bytes  a new shard starts before it would exceed `max_shard_bytes` (uncompressed)
+#   hash   `shards` shards by crc32 of the `key_column` value
+#   value  one shard per distinct `key_column` value (at most `max_open_shards` open at once)
+# The input is read once as raw bytes; records are copied verbatim (quoted newlines
+# included), so memory stays bounded by the per-shard write buffers.
+
+FLUSH_BYTES = 1 << 20  # hand a shard's buffer to its writer thread at ~1 MB
+WRITER_QUEUE_DEPTH = 4  # buffers in flight per shard before the reader waits
+MAX_PENDING_BYTES = 64 << 20  # rows buffered for shards without a running writer
+PROGRESS_EVERY = 100_000
+
+
+class HashingFile:
+    """File wrapper that hashes and counts the bytes that actually reach disk."""
+
+    def __init__(self, f, digest):
+        self.f = f
+        self.digest = digest
+        self.bytes = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.bytes += len(data)
+        return self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+
+class Shard:
+    """One output file. Rows are buffered and handed in ~1 MB blocks to the shard's
+    writer thread while it is open, so compression and I/O overlap with parsing.
+    A shard evicted from the open set keeps buffering and appends when reopened."""
+
+    def __init__(self, path, header, compress, label=None):
+        self.path = path
+        self.label = label
+        self.compress = compress
+        self.digest = hashlib.sha256()
+        self.rows = 0
+        self.raw_bytes = len(header)
+        self.disk_bytes = 0
+        self.buffer = [header]
+        self.buffered = len(header)
+        self.queue = None
+        self.thread = None
+        self.error = None
+        self.opened = False
+
+    @property
+    def is_open(self):
+        return self.queue is not None
+
+    def open(self):
+        self.queue = queue.Queue(maxsize=WRITER_QUEUE_DEPTH)
+        # First open truncates; reopening an evicted shard appends (a new gzip member)
+        file_mode = "ab" if self.opened else "wb"
+        self.opened = True
+        self.thread = threading.Thread(target=self._write_loop, args=(self.queue, file_mode), daemon=True)
+        self.thread.start()
+
+    def _write_loop(self, q, file_mode):
+        finished = False  # end marker consumed
+        try:
+            with open(self.path, file_mode) as raw:
+                sink = HashingFile(raw, self.digest)
+                out = gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=6) if self.compress else sink
+                while True:
+                    data = q.get()
+                    if data is None:
+                        finished = True
+                        break
+                    out.write(data)
+                if self.compress:
+                    out.close()
+                self.disk_bytes += sink.bytes
+        except Exception as e:
+            self.error = e
+            # Keep draining so the reader never blocks on a dead writer; a failure
+            # after the end marker (final flush / close, e.g. disk full) has nothing left to drain
+            while not finished:
+                finished = q.get() is None
+
+    def add(self, record):
+        self.buffer.append(record)
+        self.buffered += len(record)
+        self.raw_bytes += len(record)
+        self.rows += 1
+        if self.queue is not None and self.buffered >= FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.queue.put(b"".join(self.buffer))
+            self.buffer, self.buffered = [], 0
+
+    def finish(self):
+        """Queues the remaining rows and the end marker without waiting for the writer."""
+        if self.queue is not None:
+            self.flush()
+            self.queue.put(None)
+            self.queue = None
+
+    def close(self):
+        if self.thread is None and self.buffer:
+            self.open()  # rows buffered while the shard had no writer
+        if self.thread is None:
+            return
+        self.finish()
+        self.thread.join()
+        self.thread = None
+        if self.error:
+            raise self.error
+
+
+class ShardSet:
+    """Routes records to shards, keeping at most `max_open` writer threads running.
+    Rows for closed shards are buffered up to `max_pending` bytes in total; past
+    that (or when one buffer reaches FLUSH_BYTES) the fullest shard is reopened."""
+
+    def __init__(self, out_dir, stem, suffix, header, compress, max_open, max_pending=MAX_PENDING_BYTES):
+        self.out_dir = out_dir
+        self.stem = stem
+        self.suffix = suffix
+        self.header = header
+        self.compress = compress
+        self.max_open = max(1, max_open)
+        self.max_pending = max_pending
+        self.shards = OrderedDict()  # name -> Shard, in creation order
+        self.open_shards = OrderedDict()  # LRU of shards with a running writer
+        self.pending = 0
+
+    def get(self, name, label=None):
+        shard = self.shards.get(name)
+        if shard is None:
+            path = os.path.join(self.out_dir, f"{self.stem}_{name}{self.suffix}")
+            shard = self.shards[name] = Shard(path, self.header, self.compress, label)
+            self.pending += shard.buffered
+        return shard
+
+    def add(self, name, record, label=None):
+        shard = self.get(name, label)
+        if shard.is_open:
+            self.open_shards.move_to_end(name)
+            shard.add(record)
+            return shard
+        if len(self.open_shards) < self.max_open:
+            self.activate(name, shard)
+            shard.add(record)
+            return shard
+        shard.add(record)
+        self.pending += len(record)
+        if shard.buffered >= FLUSH_BYTES:
+            self.activate(name, shard)
+        elif self.pending > self.max_pending:
+            victim = max((n for n, s in self.shards.items() if not s.is_open), key=lambda n: self.shards[n].buffered)
+            self.activate(victim, self.shards[victim])
+        return shard
+
+    def activate(self, name, shard):
+        if len(self.open_shards) >= self.max_open:
+            _, oldest = self.open_shards.popitem(last=False)
+            oldest.close()
+        self.pending -= shard.buffered
+        shard.open()
+        self.open_shards[name] = shard
+
+    def retire(self, name):
+        """Finishes a shard that gets no more rows; its writer completes in the background."""
+        shard = self.open_shards.pop(name, None)
+        if shard:
+            shard.finish()
+
+    def close(self):
+        errors = []
+        for shard in self.shards.values():
+            try:
+                shard.close()
+            except Exception as e:
+                errors.append(f"{shard.path}: {e}")
+        return errors
+
+
+def iter_records(f):
+    """Yields raw CSV records (bytes), keeping quoted newlines inside their record."""
+    pending = []
+    quotes = 0
+    for line in f:
+        if pending:
+            pending.append(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                yield b"".join(pending)
+                pending, quotes = [], 0
+            continue
+        quotes = line.count(b'"')
+        if quotes % 2 == 0:
+            yield line
+        else:
+            pending = [line]
+    if pending:
+        yield b"".join(pending)
+
+
+def ensure_newline(record):
+    return record if record.endswith(b"\n") else record + b"\n"
+
+
+def key_getter(header, key_column, delimiter, encoding):
+    columns = next(csv.reader([header.decode(encoding)], delimiter=delimiter))
+    columns = [c.strip().lstrip("\ufeff") for c in columns]
+    if key_column not in columns:
+        raise ValueError(f"Key column {key_column!r} not in header: {columns}")
+    index = columns.index(key_column)
+    sep = delimiter.encode(encoding)
+
+    def get(record):
+        if b'"' not in record:
+            parts = record.rstrip(b"\r\n").split(sep)
+            return parts[index].decode(encoding) if index < len(parts) else ""
+        row = next(csv.reader([record.decode(encoding)], delimiter=delimiter))
+        return row[index] if index < len(row) else ""
+
+    return get
+
+
+def safe_name(value, limit=60):
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", value).strip("._")[:limit] or "empty"
+    # Distinct values can sanitize to the same name, so add a short digest
+    return f"{name}_{zlib.crc32(value.encode('utf-8')):08x}"
+
+
+def new_part(shard_set, previous):
+    """rows / bytes mode: the previous part gets no more rows, so its writer finishes in the background."""
+    name = f"part{len(shard_set.shards):05d}"
+    shard = shard_set.get(name)
+    shard_set.activate(name, shard)
+    if previous is not None:
+        shard_set.retire(f"part{len(shard_set.shards) - 2:05d}")
+    return shard
+
+
+def resolve_input(config):
+    source = config.get("input_file") or config.get("uploaded_csv") or config.get("chained_input")
+    if isinstance(source, dict):
+        source = source.get("output_file") or source.get("outputs") or source.get("output")
+    if isinstance(source, (list, tuple)):
+        source = next((s for s in source if str(s).endswith((".csv", ".csv.gz"))), None)
+    return source
+
+
 def run(config):
-    return f"🧠 Placeholder for csv_splitter"
+    source = resolve_input(config)
+    if not source or not os.path.exists(source):
+        return {"status": "❌ Failed", "error": f"Input CSV not found: {source!r}"}
+
+    mode = config.get("mode", "rows")
+    rows_per_shard = int(config.get("rows_per_shard", 100_000))
+    max_shard_bytes = int(config.get("max_shard_bytes", 100 * 1024 * 1024))
+    shard_count = int(config.get("shards", 8))
+    max_open = int(config.get("max_open_shards", 64))
+    key_column = config.get("key_column")
+    delimiter = config.get("delimiter", ",")
+    encoding = config.get("encoding", "utf-8")
+    compress = bool(config.get("gzip", False))
+    if mode not in ("rows", "bytes", "hash", "value"):
+        return {"status": f"❌ Unknown split mode: {mode}"}
+    if mode in ("hash", "value") and not key_column:
+        return {"status": f"❌ Mode '{mode}' needs a key_column"}
+
+    stem = re.sub(r"\.csv(\.gz)?$", "", os.path.basename(source))
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_dir = config.get("output_dir") or os.path.join("output", "csv_splitter", f"{stem}_{run_id}")
+    os.makedirs(out_dir, exist_ok=True)
+    suffix = ".csv.gz" if compress else ".csv"
+
+    shard_set = None
+    stopped = None
+    total = 0
+
+    opener = gzip.open if source.endswith(".gz") else open
+    try:
+        with opener(source, "rb") as f:
+            records = iter_records(f)
+            header = ensure_newline(next(records, b""))
+            if not header.strip():
+                return {"status": "❌ Failed", "error": f"{source} is empty"}
+            try:
+                get_key = key_getter(header, key_column, delimiter, encoding) if mode in ("hash", "value") else None
+            except ValueError as e:
+                return {"status": "❌ Failed", "error": str(e)}
+            report_progress(stage="splitting", url=source)
+
+            shard_set = ShardSet(out_dir, stem, suffix, header, compress, max_open)
+            current = None
+            for record in records:
+                record = ensure_newline(record)
+                if mode == "rows":
+                    if current is None or current.rows >= rows_per_shard:
+                        current = new_part(shard_set, current)
+                    current.add(record)
+                elif mode == "bytes":
+                    if current is None or (current.rows and current.raw_bytes + len(record) > max_shard_bytes):
+                        current = new_part(shard_set, current)
+                    current.add(record)
+                elif mode == "hash":
+                    bucket = zlib.crc32(get_key(record).encode("utf-8")) % shard_count
+                    shard_set.add(f"hash{bucket:03d}of{shard_count:03d}", record, bucket)
+                else:
+                    value = get_key(record)
+                    shard_set.add(safe_name(value), record, value)
+                total += 1
+
+                if total % PROGRESS_EVERY == 0:
+                    report_progress(stage="splitting", rows_emitted=total, shards=len(shard_set.shards))
+                    stopped = stop_reason()
+                    if stopped:
+                        break
+    finally:
+        errors = shard_set.close() if shard_set else []
+
+    if errors:
+        return {"status": "❌ Failed", "error": "; ".join(errors)}
+
+    shards = list(shard_set.shards.values())
+    report_progress(stage="writing", rows_emitted=total, shards=len(shards))
+    manifest = {
+        "source": source,
+        "source_bytes": os.path.getsize(source),
+        "mode": mode,
+        "key_column": key_column,
+        "gzip": compress,
+        "rows": total,
+        "created_at": datetime.now().isoformat(),
+        "partial": bool(stopped),
+        "shards": [
+            {
+                "file": os.path.basename(s.path),
+                "rows": s.rows,
+                "bytes": s.disk_bytes,
+                "sha256": s.digest.hexdigest(),
+                **({"key": s.label} if s.label is not None else {}),
+            }
+            for s in shards
+        ],
+    }
+    manifest_file = os.path.join(out_dir, "manifest.json")
+    with open(manifest_file, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    result = {
+        "status": "✅ Success",
+        "rows": total,
+        "shards": len(shards),
+        "manifest": manifest_file,
+        "outputs": [s.path for s in shards],
+    }
+    if stopped:
+        result["status"] = f"⚠️ Stopped ({stopped}) – partial output saved"
+        result["partial"] = True
+        result["stop_reason"] = stopped
+    return result
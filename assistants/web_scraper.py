@@ -1,10 +1,12 @@
 import requests
 from bs4 import BeautifulSoup
+import soupsieve
 import pandas as pd
 import time
 import os
 import re
 import json
+import hashlib
 from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_fixed
 from datetime import datetime
@@ -12,7 +14,29 @@ from random import choice
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
+from core.frontier import UrlFrontier
+from core.filters import FilterSyntaxError, ItemFilter, compile_filter, to_number
+from core.progress import report_progress
+from core.proxy_pool import BAN_STATUSES, get_proxy_pool
+from core.render_modes import RenderModes
+from core.run_control import fetch_timeout, interruptible_sleep, stop_if_run_over, stop_reason
+from core.scrape_state import ScrapeState, content_hash
+
+
+# Selector keys that are not item fields
+NON_FIELD_SELECTORS = {"item", "next", "link_patterns"}
+
+# Browser renders abort these requests: the item selector only needs the DOM
+BLOCKED_RESOURCES = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.css",
+    "*.mp4", "*.webm", "*.mp3",
+]
+RENDER_WAIT_SECONDS = 15
 
 
 def is_valid_url(url):
@@ -32,44 +56,174 @@ def rotate_headers():
     return choice(headers)
 
 
-def load_proxies():
-    try:
-        with open("proxies.json") as f:
-            proxy_list = json.load(f)
-        return proxy_list
-    except:
-        return []
-
-
 def normalize_text(text):
     return re.sub(r'\s+', ' ', text.strip())
 
 
 def clean_price(price):
-    return float(price.replace("$", "").strip()) if price else None
+    # Same parsing as the filter's numeric comparisons: "$1,299.99" -> 1299.99
+    return to_number(price) if price else None
+
+
+def item_fingerprint(*parts):
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=8).hexdigest()
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-def fetch_with_requests(url, headers, proxy=None):
-    proxies = {"http": proxy, "https": proxy} if proxy else None
-    return requests.get(url, headers=headers, timeout=10, proxies=proxies)
 
+def selector_fields(selectors):
+    """Item fields that can be extracted (and filtered on) with this selector config."""
+    return {"title", "price"} | {k for k in selectors if k not in NON_FIELD_SELECTORS}
 
-def fetch_with_browser(url):
+
+def extract_page(soup, selectors, item_filter=None):
+    """[(item_key, row or None if filtered out), ...] for every item on the page.
+
+    Fields are extracted lazily and the filter's cheapest predicates run
+    first, so rejected items skip the remaining selectors and price cleaning.
+    """
+    item_filter = item_filter or ItemFilter()
+    extra_fields = sorted(item_filter.fields - {"title", "price"})
+    # Compiled once per page instead of once per item and field
+    compiled = {
+        field: soupsieve.compile(selector)
+        for field, selector in selectors.items()
+        if field not in NON_FIELD_SELECTORS and isinstance(selector, str) and selector
+    }
+    entries = []
+    for item in soup.select(selectors.get("item", "div")):
+        cache = {}
+
+        def get(field):
+            if field not in cache:
+                selector = compiled.get(field)
+                el = selector.select_one(item) if selector else None
+                cache[field] = normalize_text(el.text) if el else ""
+            return cache[field]
+
+        key = item_fingerprint(item.get_text())
+        if not item_filter.accepts(get):
+            entries.append((key, None))
+            continue
+        row = {
+            "title": get("title"),
+            "price": clean_price(get("price"))
+        }
+        for field in extra_fields:
+            row[field] = get(field)
+        entries.append((key, row))
+    return entries
+
+
+def discover_links(soup, page_url, next_selector=None, link_patterns=None):
+    """Links to follow from a page: next-link selector matches and/or hrefs matching a pattern."""
+    links = []
+    if next_selector:
+        links += [a.get("href") for a in soup.select(next_selector) if a.get("href")]
+    if link_patterns:
+        compiled = [re.compile(p) for p in link_patterns]
+        for a in soup.select("a[href]"):
+            href = a["href"]
+            if any(p.search(href) for p in compiled):
+                links.append(href)
+    return links
+
+# Timeouts and retry waits are capped by the run's deadline and end early on cancel.
+# With a proxy pool, every attempt picks a healthy proxy (sticky per host) and reports
+# the outcome; a ban or 5xx through a proxy is retried through another one.
+@retry(stop=stop_after_attempt(3) | stop_if_run_over, wait=wait_fixed(2), sleep=interruptible_sleep)
+def fetch_with_requests(url, headers, proxy=None, proxy_pool=None):
+    host = urlparse(url).hostname
+    if proxy_pool:
+        proxy = proxy_pool.pick(host)
+    proxies = {"http": proxy, "https": proxy} if proxy else None
+    started = time.monotonic()
+    try:
+        res = requests.get(url, headers=headers, timeout=fetch_timeout(10), proxies=proxies)
+    except requests.RequestException:
+        if proxy_pool and proxy and not stop_reason():
+            proxy_pool.record(proxy, host, ok=False)
+        raise
+    if proxy_pool and proxy:
+        ok = res.status_code < 500 and res.status_code not in BAN_STATUSES
+        proxy_pool.record(proxy, host, ok=ok, latency=time.monotonic() - started, status=res.status_code)
+        if not ok:
+            res.raise_for_status()
+    return res
+
+
+def start_browser():
     options = Options()
     options.add_argument("--headless")
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+    })
+    # Return once the DOM is ready; fetch_with_browser waits for the items themselves
+    options.page_load_strategy = "eager"
     driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
-    driver.get(url)
-    html = driver.page_source
-    driver.quit()
-    return html
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCES})
+    except Exception as e:
+        print(f"⚠️ Could not block heavy resources: {e}")
+    return driver
+
+
+def fetch_with_browser(url, wait_selector=None, driver=None):
+    """Rendered HTML of `url`, returned as soon as `wait_selector` matches (or the wait runs out)."""
+    own_driver = driver is None
+    if own_driver:
+        driver = start_browser()
+    try:
+        driver.set_page_load_timeout(fetch_timeout(60))
+        driver.get(url)
+        if wait_selector:
+            try:
+                WebDriverWait(driver, fetch_timeout(RENDER_WAIT_SECONDS), poll_frequency=0.2).until(
+                    lambda d: d.find_elements(By.CSS_SELECTOR, wait_selector) or stop_reason())
+            except TimeoutException:
+                pass  # nothing matched: hand back what rendered so far
+        return driver.page_source
+    finally:
+        if own_driver:
+            driver.quit()
+
+
+class BrowserSession:
+    """One headless Chrome per run, started on first use and reused for every page."""
+
+    def __init__(self):
+        self.driver = None
+        self.pages = 0
+
+    def fetch(self, url, wait_selector=None):
+        if self.driver is None:
+            self.driver = start_browser()
+        self.pages += 1
+        return fetch_with_browser(url, wait_selector, driver=self.driver)
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+
+def fetch_mode(use_browser, render_modes, host):
+    """"http" / "browser", or None for an auto-mode host that hasn't been decided yet."""
+    if use_browser == "auto":
+        return render_modes.get(host)
+    return "browser" if use_browser else "http"
 
 
 def run_web_scraper(config):
     url = config.get("url")
-    filters = [f.strip().lower() for f in config.get("filters", "").split(",") if f.strip()]
+    filters = config.get("filters", "")
     prompt = config.get("prompt")
     pages = int(config.get("pages", 1))
     selector_config_path = config.get("selectors", "selectors.json")
@@ -85,6 +239,11 @@ def run_web_scraper(config):
     except:
         selectors = {"item": "div", "title": ".title", "price": ".price"}
 
+    try:
+        item_filter = compile_filter(filters, selector_fields(selectors))
+    except FilterSyntaxError as e:
+        return {"status": f"❌ Invalid filters: {e}", "output": None}
+
     headers = rotate_headers()
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
     base_output = f"web_scraper_output_{run_id}"
@@ -93,43 +252,151 @@ def run_web_scraper(config):
     os.makedirs(output_dir, exist_ok=True)
     os.makedirs(archive_dir, exist_ok=True)
 
+    # Crawl mode follows next links / link patterns; otherwise `?page=N` up to `pages`
+    crawl = config.get("crawl", False)
+    next_selector = config.get("next_selector") or selectors.get("next")
+    link_patterns = config.get("link_patterns") or selectors.get("link_patterns") or []
+    max_pages = int(config.get("max_pages", pages)) if crawl else pages
+    max_depth = config.get("max_depth")
+    frontier = UrlFrontier(max_pages=max_pages, max_depth=int(max_depth) if max_depth is not None else None)
+    frontier.add(url)
+
+    # Incremental mode: skip unchanged pages and emit only inserted/updated/removed rows
+    state = None
+    if config.get("incremental", False):
+        signature = content_hash(json.dumps([selectors, filters, crawl], sort_keys=True))
+        state = ScrapeState(url, signature, config.get("state_dir", os.path.join("state", "web_scraper")))
+    key_fields = config.get("key_fields", ["title"])
+
     all_rows = []
+    seen_items = set()
     start_time = time.time()
-    proxies = load_proxies()
-
-    for page in range(1, pages + 1):
-        page_url = f"{url}?page={page}" if page > 1 else url
+    proxy_pool = get_proxy_pool()
+    # use_browser: False = plain HTTP, True = always render, "auto" = HTTP first and
+    # render only when the item selector matches nothing (remembered per host)
+    item_selector = selectors.get("item", "div")
+    render_modes = RenderModes() if use_browser == "auto" else None
+    browser = BrowserSession()
+    page = 0
+    pages_unchanged = 0
+    stopped = None
+
+    while frontier:
+        # Cancellation / deadline is honoured at page boundaries; rows so far are kept
+        stopped = stop_reason()
+        if stopped:
+            break
+        page_url, depth = frontier.pop()
+        page += 1
         try:
-            if use_browser:
-                html = fetch_with_browser(page_url)
+            host = urlparse(page_url).hostname
+            mode = fetch_mode(use_browser, render_modes, host)
+            soup = None
+            if mode == "browser":
+                html = browser.fetch(page_url, item_selector)
             else:
-                proxy = choice(proxies) if proxies else None
-                res = fetch_with_requests(page_url, headers, proxy)
+                res = fetch_with_requests(page_url, headers, proxy_pool=proxy_pool)
                 html = res.text
-
-            soup = BeautifulSoup(html, "html.parser")
-            items = soup.select(selectors.get("item", "div"))
-
-            for item in items:
-                title_el = item.select_one(selectors.get("title", ""))
-                price_el = item.select_one(selectors.get("price", ""))
-                title = normalize_text(title_el.text) if title_el else ""
-                price = normalize_text(price_el.text) if price_el else ""
-
-                if all(f in title.lower() for f in filters):
-                    row = {
-                        "title": title,
-                        "price": clean_price(price),
-                        "page": page
-                    }
-                    all_rows.append(row)
+            if mode is None:
+                soup = BeautifulSoup(html, "html.parser")
+                if soup.select_one(item_selector) is not None:
+                    render_modes.set(host, "http")
+                else:
+                    html = browser.fetch(page_url, item_selector)
+                    soup = BeautifulSoup(html, "html.parser")
+                    # Only a render that finds items decides; an empty page may just be past the end
+                    if soup.select_one(item_selector) is not None:
+                        render_modes.set(host, "browser")
+
+            digest = content_hash(html) if state else None
+            cached = state.cached_page(page_url, digest) if state else None
+            if cached:
+                entries, links = cached["entries"], cached["links"]
+                pages_unchanged += 1
+            else:
+                if soup is None:
+                    soup = BeautifulSoup(html, "html.parser")
+                entries = extract_page(soup, selectors, item_filter)
+                links = discover_links(soup, page_url, next_selector, link_patterns) if crawl else []
+                if state:
+                    state.store_page(page_url, digest, entries, links)
         except Exception as e:
+            stopped = stop_reason()
+            if stopped:
+                page -= 1
+                break
+            report_progress(stage="error", error=str(e), pages_fetched=page - 1, url=page_url)
+            browser.close()
+            proxy_pool.save()
             return {"status": f"❌ Failed on page {page}: {e}", "output": None}
 
-    if not all_rows:
+        new_items = 0
+        for key, row in entries:
+            if key in seen_items:
+                continue
+            seen_items.add(key)
+            new_items += 1
+            if row is not None:
+                row = dict(row, page=page)
+                if crawl:
+                    row["url"] = page_url
+                all_rows.append(row)
+        report_progress(stage="scraping", pages_fetched=page, rows_emitted=len(all_rows),
+                        pages_unchanged=pages_unchanged if state else None, url=page_url)
+
+        # A page with nothing new means we ran past the last real page
+        if not new_items:
+            continue
+        if crawl:
+            for link in links:
+                frontier.add(link, depth + 1, base=page_url)
+        elif page < pages:
+            frontier.add(f"{url}?page={page + 1}", depth + 1)
+
+    browser.close()
+    proxy_pool.save()
+    changes = None
+    if state:
+        had_history = state.has_history
+        changes, items, duplicate_keys = state.diff(all_rows, key_fields)
+        if duplicate_keys:
+            print(f"⚠️ {duplicate_keys} rows share key_fields {key_fields} with an earlier row – tracked by occurrence")
+        if stopped:
+            # Unvisited pages are not removals, and the next full run should re-diff
+            changes = [row for row in changes if row["change"] != "removed"]
+        else:
+            state.save(items)
+        counts = {c: sum(1 for row in changes if row["change"] == c) for c in ("inserted", "updated", "removed")}
+        if had_history and not changes:
+            return {
+                "status": "✅ No changes since last run",
+                "run_id": run_id,
+                "assistant": "web_scraper",
+                "records": len(all_rows),
+                "pages_scraped": page,
+                "pages_unchanged": pages_unchanged,
+                "changes": counts,
+                "duplicate_keys": duplicate_keys,
+                "outputs": []
+            }
+
+    if stopped and not all_rows:
+        return {"status": f"⚠️ Run stopped ({stopped}) before any content was collected", "output": None,
+                "stop_reason": stopped, "pages_scraped": page}
+
+    if not all_rows and not changes:
         return {"status": "⚠️ No matching content found across pages", "output": None}
 
+    report_progress(stage="writing", pages_fetched=page, rows_emitted=len(all_rows))
     df = pd.DataFrame(all_rows)
+    snapshot_file = None
+    if state:
+        if config.get("snapshot", False) and not df.empty:
+            snapshot_file = os.path.join(output_dir, f"{base_output}.csv")
+            df.to_csv(snapshot_file, index=False)
+        base_output = f"web_scraper_changes_{run_id}"
+        df = pd.DataFrame(changes)
+
     csv_file = os.path.join(output_dir, f"{base_output}.csv")
     md_file = os.path.join(output_dir, f"{base_output}_summary.md")
     df.to_csv(csv_file, index=False)
@@ -145,10 +412,24 @@ def run_web_scraper(config):
         "assistant": "web_scraper",
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
         "records": len(all_rows),
-        "pages_scraped": pages,
+        "pages_scraped": page,
         "output_file": csv_file,
         "summary_md": md_file
     }
+    if stopped:
+        metadata["status"] = f"⚠️ Stopped ({stopped}) – partial output saved"
+        metadata["partial"] = True
+        metadata["stop_reason"] = stopped
+    if use_browser:
+        metadata["browser_pages"] = browser.pages
+    if proxy_pool:
+        metadata["proxies_available"] = sum(m["available"] for m in proxy_pool.metrics())
+    if state:
+        metadata["changes"] = counts
+        metadata["duplicate_keys"] = duplicate_keys
+        metadata["pages_unchanged"] = pages_unchanged
+        if snapshot_file:
+            metadata["snapshot_file"] = snapshot_file
 
     with open(os.path.join(archive_dir, "run_metadata.json"), "w") as f:
         json.dump(metadata, f, indent=2)
@@ -159,9 +440,13 @@ def run_web_scraper(config):
 
     if callback_url:
         try:
-            requests.post(callback_url, json=metadata)
+            requests.post(callback_url, json=metadata, timeout=10)
         except Exception as e:
             metadata["callback_error"] = str(e)
 
     return metadata
 
+
+
+def run(config):
+    return run_web_scraper(config)
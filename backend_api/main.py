@@ -1,17 +1,25 @@
 # main.py - Step-by-step refactor with 10 elite-level enhancements
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, ValidationError
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 from runner import run_assistant
-from enum import Enum
-import os, json
+from run_registry import registry
+from core.worker_pool import pool_stats
+from core.proxy_pool import proxy_metrics
+from core.job_queue import get_queue
+from core.retention import load_policies, run_retention, service_report, start_service
+from core.config_models import TASK_TYPES, config_model, validate_config
+from core.fast_json import COMPACT_MIN_BYTES, FastJSONResponse, dumps, loads
+import os, json, asyncio, math, time
 from datetime import datetime
 from uuid import uuid4
 
 # 1️⃣ Add CORS middleware with domain restriction
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://assistantapi.streamlit.app"],
@@ -19,40 +27,28 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Large result payloads (scraped rows, chained outputs) go out gzip-compressed
+app.add_middleware(GZipMiddleware, minimum_size=COMPACT_MIN_BYTES)
 
-# 2️⃣ Define task type with extensible enums
-class TaskType(str, Enum):
-    web_scraper = "web_scraper"
-    api_fetcher = "api_fetcher"
-    assistant_chainer = "assistant_chainer"
-
-# 3️⃣ Add request model with built-in validation
-class AssistantConfig(BaseModel):
-    task_type: TaskType
-    prompt: str
-    url: str = ""
-    filters: str = ""
-    timestamp: str = datetime.now().isoformat()
-
-    class Config:
-        schema_extra = {
-            "example": {
-                "task_type": "web_scraper",
-                "prompt": "Scrape laptops from Newegg",
-                "url": "https://www.newegg.com/laptops",
-                "filters": "price, rating",
-                "timestamp": "2025-03-22T00:00:00"
-            }
-        }
+# 2️⃣ Task types come from the assistant registry (modules in assistants/)
+# 3️⃣ Per-assistant request models, validated before any disk writes or imports
 
 # 4️⃣ Add custom exception handler for validation errors
 @app.exception_handler(ValidationError)
 async def validation_exception_handler(request: Request, exc: ValidationError):
     return JSONResponse(
         status_code=422,
-        content={"status": "❌ Validation Failed", "errors": exc.errors()},
+        content={"status": "❌ Validation Failed", "errors": exc.errors(include_url=False, include_context=False)},
     )
 
+async def read_config(request: Request):
+    """Parses and validates the body; ValidationError is answered with 422 by the handler above."""
+    try:
+        raw = loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="❌ Request body is not valid JSON")
+    return validate_config(raw)
+
 # 5️⃣ Generate a request_id for logging
 @app.middleware("http")
 async def add_request_id_header(request: Request, call_next):
@@ -64,28 +60,51 @@ async def add_request_id_header(request: Request, call_next):
 # 6️⃣ Expose available assistants as metadata
 @app.get("/assistants")
 async def get_assistant_list():
-    return {"available": [task.value for task in TaskType]}
+    return {"available": sorted(TASK_TYPES)}
+
+@app.get("/assistants/{task_type}/schema")
+async def get_assistant_schema(task_type: str):
+    if task_type not in TASK_TYPES:
+        raise HTTPException(status_code=404, detail=f"❌ Unknown assistant: {task_type}")
+    return config_model(task_type).model_json_schema()
+
+# 8️⃣ Filename-safe formatter + 9️⃣ config auto-save
+def save_config(config):
+    os.makedirs("config", exist_ok=True)
+    timestamp = config.get('timestamp', datetime.now().isoformat())
+    safe_timestamp = timestamp.replace(':','').replace('-','').replace('T','_')
+    filename = f"config_{config.get('task_type', 'unknown')}_{safe_timestamp}.json"
+    filepath = os.path.join("config", filename)
+    with open(filepath, "w") as f:
+        json.dump(config, f, indent=4)
+    return filename
+
+# ⏱️ Run deadline budget from the config or the X-Run-Deadline header (seconds).
+# Only the relative budget is saved; the clock starts when the run is submitted.
+def apply_deadline(config, request):
+    header = request.headers.get("x-run-deadline")
+    if header:
+        try:
+            seconds = float(header)
+        except ValueError:
+            seconds = None
+        if seconds is None or not math.isfinite(seconds) or seconds < 0:
+            raise HTTPException(status_code=400, detail=f"❌ X-Run-Deadline must be a number of seconds >= 0, got {header!r}")
+        config["deadline_seconds"] = seconds
+    return config
 
 # 7️⃣ Add execution API endpoint with robust logging
 @app.post("/run-assistant")
 async def run(request: Request):
+    model = await read_config(request)
+    config = apply_deadline(model.to_config(), request)
     try:
-        config = await request.json()
         print(f"🧠 Request ID: {request.state.request_id} | Received config:", config)
 
-        # 8️⃣ Filename-safe formatter
-        os.makedirs("config", exist_ok=True)
-        timestamp = config.get('timestamp', datetime.now().isoformat())
-        safe_timestamp = timestamp.replace(':','').replace('-','').replace('T','_')
-        filename = f"config_{config.get('task_type', 'unknown')}_{safe_timestamp}.json"
-        filepath = os.path.join("config", filename)
+        filename = save_config(config)
 
-        # 9️⃣ Config auto-save
-        with open(filepath, "w") as f:
-            json.dump(config, f, indent=4)
-
-        # 🔟 Run assistant and return result
-        result = run_assistant(config)
+        # 🔟 Run assistant off the event loop and return result
+        result = await run_in_threadpool(run_assistant, config)
         return {
             "status": "✅ Success",
             "request_id": request.state.request_id,
@@ -96,3 +115,131 @@ async def run(request: Request):
     except Exception as e:
         print(f"❌ Request ID: {request.state.request_id} | Internal error:", str(e))
         return JSONResponse(status_code=500, content={"status": "❌ Failed", "error": str(e)})
+
+# 🧹 Retention: background pass (ASSISTANT_RETENTION_INTERVAL) plus on-demand / dry-run reports
+@app.on_event("startup")
+async def start_retention_service():
+    start_service()
+
+@app.get("/retention")
+async def retention_report():
+    report = await run_in_threadpool(run_retention, ".", load_policies(), True)
+    return {"dry_run": report, "last_pass": service_report()}
+
+@app.post("/retention/run")
+async def retention_run(dry_run: bool = True):
+    return await run_in_threadpool(run_retention, ".", load_policies(), dry_run)
+
+# 🧵 Warm process pool status (workers, RSS, timeouts, recycles)
+@app.get("/pool")
+async def get_pool_status():
+    stats = pool_stats()
+    return {"enabled": stats is not None, "stats": stats}
+
+# 🌐 Proxy health (success rate, latency EWMA, bans, cool-downs) as last saved by the scrapers
+@app.get("/proxies")
+async def get_proxy_metrics():
+    return await run_in_threadpool(proxy_metrics)
+
+# 🛰️ Non-blocking runs: submit, then poll GET /runs/{run_id}
+@app.post("/runs", status_code=202)
+async def submit_run(request: Request):
+    model = await read_config(request)
+    config = apply_deadline(model.to_config(), request)
+    try:
+        filename = save_config(config)
+        record = registry.submit(config, request_id=request.state.request_id)
+        return {**record, "config_file": filename}
+    except Exception as e:
+        print(f"❌ Request ID: {request.state.request_id} | Submit error:", str(e))
+        return JSONResponse(status_code=500, content={"status": "❌ Failed", "error": str(e)})
+
+@app.get("/runs")
+async def list_runs(limit: int = 50):
+    return {"runs": registry.list(limit)}
+
+@app.get("/runs/{run_id}")
+async def get_run(run_id: str):
+    record = registry.get(run_id)
+    if record is None:
+        return JSONResponse(status_code=404, content={"status": "❌ Unknown run", "run_id": run_id})
+    return record
+
+@app.delete("/runs/{run_id}")
+async def cancel_run(run_id: str):
+    record = registry.cancel(run_id)
+    if record is None:
+        return JSONResponse(status_code=404, content={"status": "❌ Unknown run", "run_id": run_id})
+    return record
+
+# 📬 Durable job queue: enqueue here, run with `python backend_api/worker.py`
+@app.post("/jobs", status_code=202)
+async def enqueue_job(request: Request):
+    model = await read_config(request)
+    config = apply_deadline(model.to_config(), request)
+    try:
+        filename = save_config(config)
+        job = await run_in_threadpool(get_queue().enqueue, config)
+        return {**job, "request_id": request.state.request_id, "config_file": filename}
+    except Exception as e:
+        print(f"❌ Request ID: {request.state.request_id} | Enqueue error:", str(e))
+        return JSONResponse(status_code=500, content={"status": "❌ Failed", "error": str(e)})
+
+@app.get("/jobs")
+async def list_jobs(limit: int = 50, state: str = None):
+    return {"jobs": await run_in_threadpool(get_queue().list, limit, state)}
+
+@app.get("/jobs/stats")
+async def job_stats():
+    return await run_in_threadpool(get_queue().stats)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_in_threadpool(get_queue().get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "❌ Unknown job", "job_id": job_id})
+    return job
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = await run_in_threadpool(get_queue().cancel, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "❌ Unknown job", "job_id": job_id})
+    return job
+
+# 📡 Live progress as server-sent events; reconnects resume via Last-Event-ID / ?after=
+SSE_POLL_SECONDS = 0.25
+SSE_KEEPALIVE_SECONDS = 15
+
+@app.get("/runs/{run_id}/events")
+async def stream_run_events(run_id: str, request: Request, after: int = 0):
+    buffer = registry.events(run_id)
+    if buffer is None:
+        return JSONResponse(status_code=404, content={"status": "❌ Unknown run", "run_id": run_id})
+    last_id = int(request.headers.get("last-event-id") or after)
+
+    async def event_stream():
+        nonlocal last_id
+        last_sent = time.monotonic()
+        while True:
+            events, dropped, closed = buffer.since(last_id)
+            if dropped:
+                yield f"event: dropped\ndata: {json.dumps({'dropped': dropped})}\n\n"
+            for event in events:
+                last_id = event["id"]
+                yield f"id: {event['id']}\nevent: progress\ndata: {dumps(event).decode()}\n\n"
+            if events or dropped:
+                last_sent = time.monotonic()
+            if closed and not events:
+                record = registry.get(run_id) or {}
+                yield f"event: end\ndata: {json.dumps({'state': record.get('state')})}\n\n"
+                return
+            if await request.is_disconnected():
+                return
+            if time.monotonic() - last_sent > SSE_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(SSE_POLL_SECONDS)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,132 @@
+# run_registry.py - Background runs submitted through POST /runs
+#
+# Runs execute on a bounded thread pool (each run may in turn hand off to the
+# warm process pool), so the request returns immediately with a run_id that
+# clients poll via GET /runs/{run_id} or follow live via GET /runs/{run_id}/events.
+# Only the most recent finished runs (and their bounded event buffers) are
+# kept; queued and running runs are never evicted.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+from core.progress import ProgressBuffer, use_reporter
+from core.run_control import RunControl
+from runner import run_assistant
+
+MAX_CONCURRENT_RUNS = int(os.getenv("ASSISTANT_MAX_CONCURRENT_RUNS", "4"))
+MAX_TRACKED_RUNS = int(os.getenv("ASSISTANT_MAX_TRACKED_RUNS", "500"))
+EVENTS_PER_RUN = int(os.getenv("ASSISTANT_EVENTS_PER_RUN", "200"))
+
+
+class RunRegistry:
+    def __init__(self, max_workers=MAX_CONCURRENT_RUNS, max_tracked=MAX_TRACKED_RUNS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="assistant-run")
+        self.max_tracked = max_tracked
+        self.runs = OrderedDict()
+        self.buffers = {}
+        self.controls = {}
+        self.lock = threading.Lock()
+
+    def submit(self, config, request_id=None):
+        run_id = uuid4().hex
+        record = {
+            "run_id": run_id,
+            "request_id": request_id,
+            "task_type": config.get("task_type"),
+            "state": "queued",
+            "submitted_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+        }
+        buffer = ProgressBuffer(maxlen=EVENTS_PER_RUN)
+        buffer.append({"stage": "queued", "ts": time.time()})
+        # Deadline clock starts at submission, so time spent queued counts too
+        control = RunControl.from_config(config)
+        if control.deadline_at is not None:
+            record["deadline_at"] = datetime.fromtimestamp(control.deadline_at).isoformat()
+        with self.lock:
+            self.runs[run_id] = record
+            self.buffers[run_id] = buffer
+            self.controls[run_id] = control
+            self._evict()
+            snapshot = dict(record)
+        self.executor.submit(self._execute, run_id, config)
+        return snapshot
+
+    def _evict(self):
+        """Drops the oldest finished runs past max_tracked (caller holds the lock)."""
+        excess = len(self.runs) - self.max_tracked
+        if excess <= 0:
+            return
+        finished = [rid for rid, r in self.runs.items() if r["state"] not in ("queued", "running")][:excess]
+        for rid in finished:
+            del self.runs[rid]
+            self.buffers.pop(rid, None)
+            self.controls.pop(rid, None)
+
+    def _execute(self, run_id, config):
+        buffer = self.events(run_id) or ProgressBuffer(maxlen=EVENTS_PER_RUN)
+        with self.lock:
+            record = self.runs.get(run_id)
+            control = self.controls.get(run_id) or RunControl.from_config(config)
+            if record is None or record["state"] == "cancelled":
+                return  # cancelled while queued
+            record.update(state="running", started_at=datetime.now().isoformat())
+        buffer.append({"stage": "running", "ts": time.time()})
+        try:
+            with use_reporter(buffer.append):
+                result = run_assistant(config, control=control)
+            failed = isinstance(result, dict) and str(result.get("status", "")).startswith("❌")
+            state = "cancelled" if control.cancelled() else "failed" if failed else "succeeded"
+        except Exception as e:
+            print(f"❌ Run {run_id} crashed: {e}")
+            result, state = {"status": "❌ Failed", "error": str(e)}, "failed"
+        with self.lock:
+            if run_id in self.runs:
+                self.runs[run_id].update(state=state, result=result, finished_at=datetime.now().isoformat())
+            self._evict()
+        buffer.append({"stage": "finished", "state": state, "ts": time.time()})
+        buffer.close()
+
+    def cancel(self, run_id):
+        """Cancels a queued run outright, or asks a running one to stop at the next page."""
+        with self.lock:
+            record = self.runs.get(run_id)
+            if record is None:
+                return None
+            buffer = self.buffers.get(run_id)
+            if record["state"] == "queued":
+                record.update(state="cancelled", finished_at=datetime.now().isoformat(),
+                              result={"status": "⚠️ Cancelled before start"})
+                if buffer:
+                    buffer.append({"stage": "finished", "state": "cancelled", "ts": time.time()})
+                    buffer.close()
+            elif record["state"] == "running":
+                self.controls[run_id].cancel()
+                record["cancel_requested"] = True
+                if buffer:
+                    buffer.append({"stage": "cancelling", "ts": time.time()})
+            return dict(record)
+
+    def events(self, run_id):
+        with self.lock:
+            return self.buffers.get(run_id)
+
+    def get(self, run_id):
+        with self.lock:
+            record = self.runs.get(run_id)
+            return dict(record) if record else None
+
+    def list(self, limit=50):
+        with self.lock:
+            records = list(self.runs.values())[-limit:]
+        return [{k: v for k, v in r.items() if k != "result"} for r in reversed(records)]
+
+
+registry = RunRegistry()
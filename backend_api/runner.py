@@ -1,22 +1,27 @@
-import importlib
-import os, json
+import os, json, threading
+try:
+    import fcntl
+except ImportError:  # Windows: the thread lock still covers a single process
+    fcntl = None
+from core.run_control import RunControl, use_control
+from core.worker_pool import execute_assistant, get_pool, use_pool
 
-def run_assistant(config: dict):
+_history_lock = threading.Lock()
+
+def run_assistant(config: dict, control: RunControl = None):
     """Dynamically dispatches the assistant based on config['task_type']."""
     task_type = config.get("task_type")
-    try:
-        module = importlib.import_module(f"assistants.{task_type}")
-    except ImportError as e:
-        return {"status": "❌ Failed", "error": f"Assistant '{task_type}' not found: {e}"}
-    if not hasattr(module, "run"):
-        return {"status": "❌ Failed", "error": f"Assistant '{task_type}' has no run() function"}
-    # Run the assistant's main function
-    try:
-        result = module.run(config)
-    except Exception as e:
-        # Catch any exception during execution
-        print(f"❌ Exception in {task_type}: {e}")
-        return {"status": "❌ Failed", "error": str(e)}
+    control = control or RunControl.from_config(config)
+    if control.deadline_at is not None:
+        config["deadline_at"] = control.deadline_at  # absolute, so pool workers share it
+    with use_control(control):
+        if use_pool(config):
+            # CPU-heavy assistants run in a warm worker process with timeout / memory caps
+            ok, result = get_pool().run(task_type, config, timeout=config.get("run_timeout"))
+        else:
+            ok, result = execute_assistant(task_type, config)
+    if not ok:
+        return result
     # Determine output file names (if any) from the result
     output_files = []
     if isinstance(result, dict):
@@ -29,21 +34,33 @@ def run_assistant(config: dict):
     elif isinstance(result, str):
         output_files = [result]
     # Log history of this run
-    history_dir = os.path.join("output", task_type)
-    os.makedirs(history_dir, exist_ok=True)
-    history_path = os.path.join(history_dir, "history.json")
-    history = []
-    if os.path.exists(history_path):
-        try:
-            with open(history_path, "r") as f:
-                history = json.load(f)
-        except json.JSONDecodeError:
-            history = []
-    history.append({
+    append_history(task_type, {
         "timestamp": config.get("timestamp"),
         "prompt": config.get("prompt"),
         "outputs": output_files
     })
-    with open(history_path, "w") as f:
-        json.dump(history, f, indent=2)
     return result
+
+
+def append_history(task_type, entry):
+    """Appends to output/<task>/history.json under a thread lock plus an fcntl file lock,
+    so concurrent runs (threads, pool workers, uvicorn / queue worker processes) don't
+    lose each other's entries."""
+    history_dir = os.path.join("output", task_type)
+    os.makedirs(history_dir, exist_ok=True)
+    history_path = os.path.join(history_dir, "history.json")
+    with _history_lock, open(history_path + ".lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        history = []
+        if os.path.exists(history_path):
+            try:
+                with open(history_path, "r") as f:
+                    history = json.load(f)
+            except json.JSONDecodeError:
+                history = []
+        history.append(entry)
+        tmp = f"{history_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp, history_path)
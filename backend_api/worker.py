@@ -0,0 +1,141 @@
+# worker.py - Standalone worker for the durable job queue (core/job_queue.py)
+#
+# Claims jobs enqueued through POST /jobs, runs them with runner.run_assistant
+# and renews each job's lease with heartbeats while it runs. Start as many as
+# you like on the host that holds the queue database (SQLite on a network
+# filesystem is not safe, see core/job_queue.py):
+#
+#   python backend_api/worker.py --concurrency 4
+#   python backend_api/worker.py --task-types web_scraper --lease 120
+#
+# SIGINT / SIGTERM stop claiming new jobs and let running ones finish; a second
+# signal exits at once (the leases then expire and the jobs are re-queued).
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "backend_api")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+import signal
+import socket
+import threading
+import time
+
+from core.job_queue import DEFAULT_DB, DEFAULT_LEASE_SECONDS, JobQueue
+from core.progress import use_reporter
+from core.run_control import RunControl
+from runner import run_assistant
+
+
+class QueueWorker:
+    def __init__(self, queue, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS, task_types=None, poll_interval=1.0):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.task_types = task_types
+        self.poll_interval = poll_interval
+
+    def run_job(self, job):
+        job_id, config = job["job_id"], job["config"]
+        # The deadline budget counts from the start of each attempt: a job re-claimed
+        # after a lost lease gets its full deadline_seconds again. (Jobs enqueued by
+        # older versions carry an absolute deadline_at from enqueue time; drop it.)
+        config.pop("deadline_at", None)
+        control = RunControl.from_config(config)
+        latest = {}
+        done = threading.Event()
+
+        def heartbeat():
+            lease_until = time.monotonic() + self.lease_seconds
+            while not done.wait(self.lease_seconds / 3):
+                try:
+                    status = self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds, latest.get("event"))
+                except Exception as e:
+                    # e.g. sqlite3.OperationalError while the db is locked: keep
+                    # trying, but stop the run once the lease has surely lapsed
+                    if time.monotonic() >= lease_until:
+                        print(f"🛑 Job {job_id}: lease not renewed ({e}) – stopping")
+                        control.cancel()
+                        return
+                    print(f"⚠️ Job {job_id}: heartbeat failed, retrying: {e}")
+                    continue
+                lease_until = time.monotonic() + self.lease_seconds
+                if status != "ok":
+                    # "cancel": DELETE /jobs/{id}; "lost": the lease expired and the job was re-queued
+                    print(f"🛑 Job {job_id}: {status} – stopping")
+                    control.cancel()
+                    return
+
+        beat = threading.Thread(target=heartbeat, name=f"heartbeat-{job_id[:8]}", daemon=True)
+        beat.start()
+        print(f"⚙️ {self.worker_id} running job {job_id} ({job['task_type']}, attempt {job['attempts']})")
+        try:
+            with use_reporter(lambda event: latest.update(event=event)):
+                result = run_assistant(config, control=control)
+            failed = isinstance(result, dict) and str(result.get("status", "")).startswith("❌")
+            state = "cancelled" if control.cancelled() else "failed" if failed else "succeeded"
+            self.queue.complete(job_id, self.worker_id, result, state)
+            print(f"✅ Job {job_id} {state}")
+        except Exception as e:
+            print(f"❌ Job {job_id} crashed: {e}")
+            self.queue.fail(job_id, self.worker_id, e)
+        finally:
+            done.set()
+            beat.join()
+
+    def loop(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                job = self.queue.claim(self.worker_id, self.lease_seconds, self.task_types)
+            except Exception as e:
+                print(f"⚠️ {self.worker_id} could not claim a job: {e}")
+                job = None
+            if job is None:
+                stop_event.wait(self.poll_interval)
+                continue
+            self.run_job(job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued assistant jobs.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Queue database (default: ASSISTANT_QUEUE_DB or state/jobs.db)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs to run at once in this process")
+    parser.add_argument("--task-types", default="", help="Only claim these task types (comma-separated)")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="Lease length in seconds")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between claims when the queue is empty")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.db)
+    task_types = [t.strip() for t in args.task_types.split(",") if t.strip()] or None
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        if stop_event.is_set():
+            print("🛑 Exiting now")
+            os._exit(1)
+        print("🛑 Draining: finishing running jobs (signal again to exit)")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    threads = []
+    for i in range(max(1, args.concurrency)):
+        worker = QueueWorker(queue, f"{base_id}:{i}", args.lease, task_types, args.poll)
+        thread = threading.Thread(target=worker.loop, args=(stop_event,), name=f"queue-worker-{i}")
+        thread.start()
+        threads.append(thread)
+    print(f"🧵 Worker {base_id} polling {args.db} with {len(threads)} slot(s)"
+          f"{' for ' + ', '.join(task_types) if task_types else ''}")
+    while any(t.is_alive() for t in threads):
+        for thread in threads:
+            thread.join(timeout=0.5)
+
+
+if __name__ == "__main__":
+    main()
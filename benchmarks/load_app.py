@@ -0,0 +1,73 @@
+# benchmarks/load_app.py - backend_api.main:app wired up for load testing
+#
+# Registers a stub assistant (`load_stub`) with configurable sleep / CPU cost /
+# failure rate and adds a `/__loop_lag` probe that reports how late the event
+# loop wakes up, then re-exports the real FastAPI app for uvicorn:
+#
+#   uvicorn load_app:app --workers 4      (with repo root + backend_api on PYTHONPATH)
+
+import asyncio
+import os
+import random
+import sys
+import time
+import types
+from collections import deque
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "backend_api")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import assistants  # noqa: E402
+from core.config_models import register_task_type  # noqa: E402
+
+
+def stub_run(config):
+    """Sleeps `sleep_ms`, burns `cpu_ms` of CPU, fails with `fail_rate`."""
+    sleep_ms = float(config.get("sleep_ms", 0))
+    cpu_ms = float(config.get("cpu_ms", 0))
+    if sleep_ms:
+        time.sleep(sleep_ms / 1000)
+    if cpu_ms:
+        end = time.perf_counter() + cpu_ms / 1000
+        x = 0
+        while time.perf_counter() < end:
+            x += 1
+    if random.random() < float(config.get("fail_rate", 0)):
+        raise RuntimeError("synthetic stub failure")
+    return {"status": "✅ Success", "outputs": []}
+
+
+stub = types.ModuleType("assistants.load_stub")
+stub.run = stub_run
+sys.modules["assistants.load_stub"] = stub
+assistants.load_stub = stub
+register_task_type("load_stub")
+
+from main import app  # noqa: E402
+
+PROBE_INTERVAL = 0.05
+lag_samples = deque(maxlen=5000)
+
+
+async def _probe_loop_lag():
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lag_samples.append((loop.time() - start - PROBE_INTERVAL) * 1000)
+
+
+@app.on_event("startup")
+async def _start_probe():
+    app.state.lag_probe = asyncio.create_task(_probe_loop_lag())
+
+
+@app.get("/__loop_lag")
+async def loop_lag(reset: bool = False):
+    samples = list(lag_samples)
+    if reset:
+        lag_samples.clear()
+    return {"pid": os.getpid(), "samples_ms": samples}
@@ -0,0 +1,285 @@
+# benchmarks/load_test.py - End-to-end load test for the FastAPI backend
+#
+# Starts `uvicorn load_app:app` locally (stub assistant, no outside services)
+# inside a throwaway working directory, drives it with concurrent clients and
+# reports throughput, p50/p95/p99 latency, error rate and event-loop lag.
+#
+# Usage (from the repo root):
+#   python benchmarks/load_test.py --scenario mixed --workers 1 --concurrency 32
+#   python benchmarks/load_test.py --scenario history_contention --workers 4
+#   python benchmarks/load_test.py --url http://127.0.0.1:8000   # existing server
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# run_share = fraction of /run-assistant calls (rest go to /assistants)
+SCENARIOS = {
+    "mixed": {"run_share": 0.7, "sleep_ms": 50, "cpu_ms": 5, "fail_rate": 0.0, "fixed_timestamp": False},
+    "cpu_bound": {"run_share": 1.0, "sleep_ms": 0, "cpu_ms": 50, "fail_rate": 0.0, "fixed_timestamp": False},
+    # Every run writes the same config/config_load_stub_<ts>.json file
+    "config_contention": {"run_share": 1.0, "sleep_ms": 0, "cpu_ms": 0, "fail_rate": 0.0, "fixed_timestamp": True},
+    # Every run appends to output/load_stub/history.json as fast as possible
+    "history_contention": {"run_share": 1.0, "sleep_ms": 0, "cpu_ms": 0, "fail_rate": 0.0, "fixed_timestamp": False},
+    "flaky": {"run_share": 0.9, "sleep_ms": 20, "cpu_ms": 2, "fail_rate": 0.1, "fixed_timestamp": False},
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return round(ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo), 3)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir, port, workers):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [BENCH_DIR, ROOT_DIR, os.path.join(ROOT_DIR, "backend_api"), env.get("PYTHONPATH", "")]
+    )
+    cmd = [sys.executable, "-m", "uvicorn", "load_app:app", "--host", "127.0.0.1",
+           "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    # The app prints every received config; keep stdout quiet so the report stays readable
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+        try:
+            requests.get(f"{base_url}/assistants", timeout=1)
+            return proc, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+
+class LoadGenerator:
+    def __init__(self, base_url, scenario, concurrency, total_requests, duration):
+        self.base_url = base_url
+        self.scenario = scenario
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.issued = 0
+        self.results = []  # (endpoint, latency_ms, ok)
+        self.fixed_timestamp = datetime.now().isoformat()
+        self.local = threading.local()
+
+    def _session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _next_slot(self, stop_at):
+        with self.lock:
+            if self.total_requests and self.issued >= self.total_requests:
+                return False
+            if stop_at and time.perf_counter() >= stop_at:
+                return False
+            self.issued += 1
+            return True
+
+    def _one_request(self):
+        sc = self.scenario
+        session = self._session()
+        if random.random() < sc["run_share"]:
+            endpoint = "/run-assistant"
+            config = {
+                "task_type": "load_stub",
+                "prompt": "load test",
+                "sleep_ms": sc["sleep_ms"],
+                "cpu_ms": sc["cpu_ms"],
+                "fail_rate": sc["fail_rate"],
+                "timestamp": self.fixed_timestamp if sc["fixed_timestamp"] else datetime.now().isoformat(),
+            }
+            start = time.perf_counter()
+            try:
+                res = session.post(f"{self.base_url}{endpoint}", json=config, timeout=120)
+                body = res.json()
+                result = body.get("result", {})
+                ok = res.status_code == 200 and not str(result.get("status", "")).startswith("❌")
+            except (requests.RequestException, ValueError):
+                ok = False
+        else:
+            endpoint = "/assistants"
+            start = time.perf_counter()
+            try:
+                ok = session.get(f"{self.base_url}{endpoint}", timeout=120).status_code == 200
+            except requests.RequestException:
+                ok = False
+        latency = (time.perf_counter() - start) * 1000
+        with self.lock:
+            self.results.append((endpoint, latency, ok))
+
+    def _client(self, stop_at):
+        while self._next_slot(stop_at):
+            self._one_request()
+
+    def run(self):
+        stop_at = time.perf_counter() + self.duration if self.duration else None
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for _ in range(self.concurrency):
+                pool.submit(self._client, stop_at)
+        return time.perf_counter() - start
+
+
+def collect_loop_lag(base_url, probes=16):
+    """Samples /__loop_lag a few times to reach (most of) the uvicorn workers."""
+    by_pid = {}
+    for _ in range(probes):
+        try:
+            data = requests.get(f"{base_url}/__loop_lag", params={"reset": "true"}, timeout=10).json()
+            by_pid.setdefault(data["pid"], []).extend(data["samples_ms"])
+        except (requests.RequestException, ValueError, KeyError):
+            continue
+    samples = [s for values in by_pid.values() for s in values]
+    return {
+        "workers_sampled": len(by_pid),
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99),
+        "max_ms": round(max(samples), 3) if samples else None,
+    }
+
+
+def summarize(results, elapsed):
+    def stats(rows):
+        latencies = [r[1] for r in rows]
+        errors = sum(1 for r in rows if not r[2])
+        return {
+            "requests": len(rows),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": round(statistics.fmean(latencies), 3) if latencies else None,
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+        }
+
+    summary = stats(results)
+    summary["throughput_rps"] = round(len(results) / elapsed, 2) if elapsed else 0.0
+    summary["elapsed_s"] = round(elapsed, 3)
+    summary["by_endpoint"] = {
+        endpoint: stats([r for r in results if r[0] == endpoint])
+        for endpoint in sorted({r[0] for r in results})
+    }
+    return summary
+
+
+def history_integrity(workdir, run_requests):
+    """Counts entries that survived concurrent read-modify-write of history.json."""
+    path = os.path.join(workdir, "output", "load_stub", "history.json")
+    try:
+        with open(path) as f:
+            recorded = len(json.load(f))
+    except (OSError, ValueError):
+        recorded = 0
+    return {"run_requests": run_requests, "history_entries": recorded, "lost": max(run_requests - recorded, 0)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the assistant backend")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="total requests (0 = use --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="seconds to run when --requests is 0")
+    parser.add_argument("--sleep-ms", type=float, help="override stub sleep per run")
+    parser.add_argument("--cpu-ms", type=float, help="override stub CPU cost per run")
+    parser.add_argument("--fail-rate", type=float, help="override stub failure rate")
+    parser.add_argument("--url", help="target an already running load_app server instead of starting one")
+    args = parser.parse_args(argv)
+
+    scenario = dict(SCENARIOS[args.scenario])
+    for key in ("sleep_ms", "cpu_ms", "fail_rate"):
+        override = getattr(args, key)
+        if override is not None:
+            scenario[key] = override
+
+    proc = None
+    workdir_ctx = tempfile.TemporaryDirectory(prefix="assistant_load_")
+    workdir = workdir_ctx.name
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            proc, base_url = start_server(workdir, free_port(), args.workers)
+        collect_loop_lag(base_url)  # reset samples gathered during startup
+
+        print(f"🚀 {args.scenario}: {args.concurrency} clients, {args.workers} worker(s) -> {base_url}")
+        generator = LoadGenerator(base_url, scenario, args.concurrency, args.requests, args.duration)
+        elapsed = generator.run()
+
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "scenario": args.scenario,
+            "settings": scenario,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "summary": summarize(generator.results, elapsed),
+            "event_loop_lag": collect_loop_lag(base_url, probes=4 * args.workers),
+        }
+        if not args.url:
+            run_requests = sum(1 for r in generator.results if r[0] == "/run-assistant")
+            report["history"] = history_integrity(workdir, run_requests)
+            report["config_files"] = len(os.listdir(os.path.join(workdir, "config"))) \
+                if os.path.isdir(os.path.join(workdir, "config")) else 0
+    finally:
+        if proc:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        workdir_ctx.cleanup()
+
+    s = report["summary"]
+    lag = report["event_loop_lag"]
+    print(f"📈 {s['requests']} requests in {s['elapsed_s']}s = {s['throughput_rps']} req/s, "
+          f"errors {s['error_rate'] * 100:.1f}%")
+    print(f"⏱️ latency p50 {s['p50_ms']} ms | p95 {s['p95_ms']} ms | p99 {s['p99_ms']} ms")
+    for endpoint, e in s["by_endpoint"].items():
+        print(f"   {endpoint:<16} n={e['requests']:<6} p50 {e['p50_ms']} ms  p99 {e['p99_ms']} ms")
+    print(f"🌀 event-loop lag p50 {lag['p50_ms']} ms | p99 {lag['p99_ms']} ms | max {lag['max_ms']} ms "
+          f"({lag['workers_sampled']} worker(s) sampled)")
+    if "history" in report:
+        h = report["history"]
+        print(f"🗂️ history.json: {h['history_entries']}/{h['run_requests']} entries kept ({h['lost']} lost), "
+              f"{report['config_files']} config file(s) written")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"load_{args.scenario}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+# benchmarks/run_benchmarks.py - Offline micro-benchmarks for the assistants
+#
+# Usage (from the repo root):
+#   python benchmarks/run_benchmarks.py                    # run + compare to baseline
+#   python benchmarks/run_benchmarks.py --save-baseline    # record a new baseline
+#   python benchmarks/run_benchmarks.py --scenario large --repeat 10
+#
+# Everything runs against benchmarks/stand_in_server.py on 127.0.0.1, inside a
+# throwaway working directory, so no network access is needed and the repo's
+# output/, archive/ and config/ folders are left untouched.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+from io import StringIO
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "backend_api"), BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from stand_in_server import StandInServer  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+BENCH_SELECTORS = os.path.join(BENCH_DIR, "bench_selectors.json")
+
+
+def default_pages():
+    """Page count from the repo's sample scraper config (selectors.json)."""
+    try:
+        with open(os.path.join(ROOT_DIR, "selectors.json")) as f:
+            return int(json.load(f).get("pages", 2))
+    except Exception:
+        return 2
+
+
+# Server settings per scenario; `items`/`pages` follow the sample config by default
+SCENARIOS = {
+    "small": {"items": 40, "pages": default_pages(), "page_kb": 0, "latency_ms": 0, "error_rate": 0.0},
+    "large": {"items": 400, "pages": 5, "page_kb": 512, "latency_ms": 0, "error_rate": 0.0},
+    "slow_api": {"items": 100, "pages": 5, "page_kb": 0, "latency_ms": 50, "error_rate": 0.0},
+    "flaky_api": {"items": 100, "pages": 5, "page_kb": 0, "latency_ms": 5, "error_rate": 0.2},
+}
+
+
+class StageTimer:
+    """Collects wall-clock samples per stage name."""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            raise
+        finally:
+            self.samples.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    def summary(self):
+        out = {}
+        for name, values in self.samples.items():
+            out[name] = {
+                "median_ms": round(statistics.median(values), 3),
+                "min_ms": round(min(values), 3),
+                "mean_ms": round(statistics.fmean(values), 3),
+                "runs": len(values),
+                "errors": self.errors.get(name, 0),
+            }
+        return out
+
+
+def bench_web_scraper(timer, base_url, settings):
+    import pandas as pd
+    from bs4 import BeautifulSoup
+    from assistants import web_scraper
+    from core.filters import compile_filter
+
+    with open(BENCH_SELECTORS) as f:
+        selectors = json.load(f)
+    url = f"{base_url}/products"
+    headers = web_scraper.rotate_headers()
+
+    pages_html = []
+    with timer.stage("web_scraper.fetch"):
+        for page in range(1, settings["pages"] + 1):
+            page_url = f"{url}?page={page}" if page > 1 else url
+            pages_html.append(web_scraper.fetch_with_requests(page_url, headers).text)
+
+    soups = []
+    with timer.stage("web_scraper.parse"):
+        for html in pages_html:
+            soups.append(BeautifulSoup(html, "html.parser"))
+
+    rows = []
+    with timer.stage("web_scraper.extract"):
+        for page, soup in enumerate(soups, start=1):
+            for _, row in web_scraper.extract_page(soup, selectors):
+                rows.append(dict(row, page=page))
+
+    # Filtered extraction should beat web_scraper.extract: rejected items skip the remaining fields
+    fields = web_scraper.selector_fields(selectors)
+    for stage, text in (("extract_filtered", "laptop, price < 1000 and rating >= 4"),
+                        ("extract_filtered_numeric", "price < 500")):
+        item_filter = compile_filter(text, fields)
+        with timer.stage(f"web_scraper.{stage}"):
+            for soup in soups:
+                web_scraper.extract_page(soup, selectors, item_filter)
+
+    with timer.stage("web_scraper.dataframe"):
+        df = pd.DataFrame(rows)
+    with timer.stage("web_scraper.write_csv"):
+        df.to_csv("bench_web_scraper.csv", index=False)
+
+    config = {
+        "task_type": "web_scraper",
+        "prompt": "benchmark",
+        "url": url,
+        "filters": "",
+        "pages": settings["pages"],
+        "selectors": BENCH_SELECTORS,
+        "timestamp": datetime.now().isoformat(),
+    }
+    with timer.stage("web_scraper.end_to_end"):
+        result = web_scraper.run_web_scraper(config)
+    if not str(result.get("status", "")).startswith("✅"):
+        raise RuntimeError(f"web_scraper failed: {result.get('status')}")
+
+
+def bench_api_fetcher(timer, base_url, settings):
+    import pandas as pd
+    import requests
+    from assistants import api_fetcher
+
+    with timer.stage("api_fetcher.paginate"):
+        rows, next_url = [], f"{base_url}/api/items?page=1"
+        while next_url:
+            payload = requests.get(next_url, timeout=10).json()
+            if "error" in payload:
+                raise RuntimeError(payload["error"])
+            rows.extend(payload["items"])
+            next_url = f"{base_url}{payload['next']}" if payload.get("next") else None
+
+    with timer.stage("api_fetcher.json_normalize"):
+        df = pd.json_normalize(rows)
+    with timer.stage("api_fetcher.write_csv"):
+        df.to_csv("bench_api_fetcher.csv", index=False)
+
+    config = {
+        "task_type": "api_fetcher",
+        "url": f"{base_url}/api/items?envelope=0",
+        "filters": "id,title,price,rating,specs.ram_gb",
+        "timestamp": datetime.now().isoformat(),
+    }
+    with timer.stage("api_fetcher.end_to_end"):
+        result = api_fetcher.run(config)
+    if not str(result.get("status", "")).startswith("✅"):
+        raise RuntimeError(f"api_fetcher failed: {result.get('error')}")
+
+
+def bench_table_parser(timer, base_url, settings):
+    import pandas as pd
+    import requests
+    from bs4 import BeautifulSoup
+
+    html = requests.get(f"{base_url}/tables?tables=3", timeout=10).text
+    # Same steps as assistants/assistant_table_parser.py (Streamlit-free)
+    with timer.stage("table_parser.detect"):
+        tables = BeautifulSoup(html, "html.parser").find_all("table")
+    with timer.stage("table_parser.read_html"):
+        parsed = [pd.read_html(StringIO(str(tbl)))[0] for tbl in tables]
+    with timer.stage("table_parser.infer_types"):
+        for df in parsed:
+            for col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce").fillna(df[col])
+
+
+def bench_runner(timer, base_url, settings):
+    from runner import run_assistant
+
+    configs = [
+        {
+            "task_type": "api_fetcher",
+            "prompt": "benchmark",
+            "url": f"{base_url}/api/items?envelope=0",
+            "filters": "id,title,price",
+        },
+        {
+            "task_type": "web_scraper",
+            "prompt": "benchmark",
+            "url": f"{base_url}/products",
+            "pages": settings["pages"],
+            "selectors": BENCH_SELECTORS,
+        },
+    ]
+    for config in configs:
+        config["timestamp"] = datetime.now().isoformat()
+        with timer.stage(f"runner.{config['task_type']}"):
+            result = run_assistant(config)
+        if isinstance(result, dict) and str(result.get("status", "")).startswith("❌"):
+            raise RuntimeError(f"runner {config['task_type']} failed: {result.get('error')}")
+
+
+BENCHMARKS = {
+    "web_scraper": bench_web_scraper,
+    "api_fetcher": bench_api_fetcher,
+    "table_parser": bench_table_parser,
+    "runner": bench_runner,
+}
+
+
+def run_scenario(name, repeat, warmup, only=None):
+    settings = SCENARIOS[name]
+    timer = StageTimer()
+    failures = {}
+    with StandInServer(**settings) as server:
+        for bench_name, bench in BENCHMARKS.items():
+            if only and bench_name not in only:
+                continue
+            for i in range(warmup + repeat):
+                run_timer = StageTimer() if i < warmup else timer
+                try:
+                    bench(run_timer, server.base_url, settings)
+                except Exception as e:
+                    if i >= warmup:
+                        failures.setdefault(bench_name, []).append(str(e))
+                    if isinstance(e, ImportError):
+                        print(f"⚠️ Skipping {bench_name}: {e}")
+                        break
+    return {"settings": settings, "stages": timer.summary(), "failures": failures}
+
+
+def compare(current, baseline, threshold, min_delta_ms):
+    """Returns a list of regressions: stages slower than baseline by > threshold."""
+    regressions = []
+    for scenario, data in current["scenarios"].items():
+        base_stages = baseline.get("scenarios", {}).get(scenario, {}).get("stages", {})
+        for stage, stats in data["stages"].items():
+            base = base_stages.get(stage)
+            if not base:
+                continue
+            limit = base["median_ms"] * (1 + threshold)
+            delta = stats["median_ms"] - base["median_ms"]
+            if stats["median_ms"] > limit and delta > min_delta_ms:
+                regressions.append({
+                    "scenario": scenario,
+                    "stage": stage,
+                    "baseline_ms": base["median_ms"],
+                    "current_ms": stats["median_ms"],
+                    "change_pct": round(100 * delta / max(base["median_ms"], 1e-9), 1),
+                })
+    return regressions
+
+
+def print_report(report):
+    for scenario, data in report["scenarios"].items():
+        print(f"\n📊 Scenario: {scenario} {data['settings']}")
+        for stage, stats in sorted(data["stages"].items()):
+            err = f"  ({stats['errors']} errors)" if stats["errors"] else ""
+            print(f"  {stage:<28} median {stats['median_ms']:>10.2f} ms   min {stats['min_ms']:>10.2f} ms{err}")
+        for bench_name, errors in data["failures"].items():
+            icon = "⚠️" if data["settings"].get("error_rate") else "❌"
+            print(f"  {icon} {bench_name}: {len(errors)} failed runs (last: {errors[-1]})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline assistant micro-benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario(s) to run (default: all)")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="Benchmark group(s) to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown vs baseline median (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Ignore regressions smaller than this many milliseconds")
+    args = parser.parse_args(argv)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "scenarios": {},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="assistant_bench_") as workdir:
+        os.chdir(workdir)
+        try:
+            for scenario in args.scenario or list(SCENARIOS):
+                report["scenarios"][scenario] = run_scenario(scenario, args.repeat, args.warmup, args.only)
+        except Exception:
+            traceback.print_exc()
+            return 2
+        finally:
+            os.chdir(cwd)
+
+    print_report(report)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    result_path = os.path.join(RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(result_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {result_path}")
+
+    # A benchmark whose assistant errors must fail the gate (and never become the baseline).
+    # Scenarios that inject server errors (error_rate > 0) are expected to see some failures.
+    failed = sum(
+        len(errors)
+        for data in report["scenarios"].values() if not data["settings"].get("error_rate")
+        for errors in data["failures"].values()
+    )
+    if failed:
+        print(f"\n❌ {failed} benchmark run(s) failed – see above")
+        return 1
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️ No baseline found – run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n🚨 {len(regressions)} regression(s) over {int(args.threshold * 100)}%:")
+        for r in regressions:
+            print(f"  {r['scenario']}/{r['stage']}: {r['baseline_ms']} ms -> {r['current_ms']} ms (+{r['change_pct']}%)")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
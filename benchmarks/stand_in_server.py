@@ -0,0 +1,188 @@
+# benchmarks/stand_in_server.py - Local stand-in web server for offline benchmarks
+#
+# Serves synthetic product listing pages (HTML) and a paginated JSON API so the
+# assistants can be exercised without touching the network.
+#
+#   /products?page=N           -> HTML listing with `items` products per page
+#   /api/items?page=N          -> {"page", "total_pages", "next", "items": [...]}
+#   /api/items?envelope=0      -> bare list of items (what api_fetcher normalizes)
+#   /tables                    -> HTML document with <table> blocks
+#
+# Every endpoint honours `latency_ms` and `error_rate` (server defaults, or
+# per-request query overrides) so slow or flaky upstreams can be simulated.
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+BRANDS = ["Acer", "Asus", "Dell", "HP", "Lenovo", "MSI", "Razer", "Samsung"]
+KINDS = ["Laptop", "Ultrabook", "Gaming Laptop", "Chromebook", "2-in-1"]
+
+
+def product(page, idx, seed=0):
+    rnd = random.Random(seed * 1_000_003 + page * 10_007 + idx)
+    return {
+        "id": (page - 1) * 1000 + idx,
+        "title": f"{rnd.choice(BRANDS)} {rnd.choice(KINDS)} {rnd.randint(100, 999)}",
+        "price": round(rnd.uniform(199, 2999), 2),
+        "rating": round(rnd.uniform(1, 5), 1),
+        "specs": {"ram_gb": rnd.choice([8, 16, 32, 64]), "ssd_gb": rnd.choice([256, 512, 1024])},
+    }
+
+
+def render_listing(page, items, seed=0, page_kb=0, pages=1):
+    """HTML page whose markup matches benchmarks/bench_selectors.json."""
+    parts = ["<html><head><title>Products</title></head><body><main>"]
+    for idx in range(items):
+        p = product(page, idx, seed)
+        parts.append(
+            f'<div class="product" data-id="{p["id"]}">'
+            f'<h2 class="title">  {p["title"]}\n</h2>'
+            f'<span class="price">${p["price"]}</span>'
+            f'<span class="rating">{p["rating"]}</span>'
+            f'<ul class="specs"><li>{p["specs"]["ram_gb"]}GB RAM</li><li>{p["specs"]["ssd_gb"]}GB SSD</li></ul>'
+            "</div>"
+        )
+    if page < pages:
+        parts.append(f'<a class="next" rel="next" href="/products?page={page + 1}">Next</a>')
+    parts.append("</main>")
+    html = "".join(parts)
+    # Pad with realistic-looking noise up to the requested page size
+    filler = '<div class="ad"><p>Sponsored content placeholder text.</p></div>'
+    missing = page_kb * 1024 - len(html)
+    if missing > 0:
+        html += filler * (missing // len(filler) + 1)
+    return html + "</body></html>"
+
+
+def render_tables(tables, rows, seed=0):
+    parts = ["<html><body>"]
+    for t in range(tables):
+        parts.append("<table><tr><th>title</th><th>price</th><th>rating</th></tr>")
+        for r in range(rows):
+            p = product(t + 1, r, seed)
+            parts.append(f"<tr><td>{p['title']}</td><td>{p['price']}</td><td>{p['rating']}</td></tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def _param(self, query, name, default, cast):
+        try:
+            return cast(query[name][0]) if name in query else default
+        except (ValueError, IndexError):
+            return default
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client gave up (e.g. a deadline-capped timeout)
+
+    def do_GET(self):
+        settings = self.server.settings
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        latency_ms = self._param(query, "latency_ms", settings["latency_ms"], float)
+        error_rate = self._param(query, "error_rate", settings["error_rate"], float)
+        page = max(1, self._param(query, "page", 1, int))
+        pages = self._param(query, "pages", settings["pages"], int)
+        items = self._param(query, "items", settings["items"], int)
+
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        if error_rate and random.random() < error_rate:
+            return self._send(500, json.dumps({"error": "synthetic failure"}), "application/json")
+
+        if parsed.path == "/products":
+            if page > pages:
+                return self._send(200, render_listing(page, 0, pages=pages), "text/html")
+            html = render_listing(page, items, settings["seed"], settings["page_kb"], pages)
+            return self._send(200, html, "text/html")
+        if parsed.path == "/api/items":
+            rows = [product(page, i, settings["seed"]) for i in range(items)] if page <= pages else []
+            nxt = f"/api/items?page={page + 1}" if page < pages else None
+            body = {"page": page, "total_pages": pages, "next": nxt, "items": rows}
+            if query.get("envelope", ["1"])[0] == "0":
+                body = rows
+            return self._send(200, json.dumps(body), "application/json")
+        if parsed.path == "/tables":
+            tables = self._param(query, "tables", 3, int)
+            return self._send(200, render_tables(tables, items, settings["seed"]), "text/html")
+        return self._send(404, json.dumps({"error": "not found"}), "application/json")
+
+
+class StandInServer:
+    """Runs the stand-in server on a background thread (port 0 = pick a free port)."""
+
+    def __init__(self, host="127.0.0.1", port=0, items=40, pages=2, page_kb=0,
+                 latency_ms=0, error_rate=0.0, seed=0):
+        self.httpd = ThreadingHTTPServer((host, port), StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.settings = {
+            "items": items,
+            "pages": pages,
+            "page_kb": page_kb,
+            "latency_ms": latency_ms,
+            "error_rate": error_rate,
+            "seed": seed,
+        }
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, **settings):
+        self.httpd.settings.update(settings)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve synthetic listings and APIs locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--page-kb", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StandInServer(port=args.port, items=args.items, pages=args.pages, page_kb=args.page_kb,
+                           latency_ms=args.latency_ms, error_rate=args.error_rate)
+    print(f"🌐 Stand-in server on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,226 @@
+# core/config_models.py - Typed per-assistant configs, validated at the API edge
+#
+# The assistant registry is the set of modules in assistants/ that define a
+# top-level run(); register_task_type() adds assistants installed at runtime
+# (e.g. the load-test stub in benchmarks/load_app.py). Each assistant can
+# register a pydantic model in CONFIG_MODELS describing the keys its run()
+# reads; assistants without one get the shared BaseAssistantConfig. Models
+# allow extra keys (assistants read plenty of optional ones) but reject
+# unknown task types, malformed URLs, missing required inputs and wrong types
+# before the backend writes the config to disk or imports the assistant.
+#
+# validate_config(raw) returns the typed model; model.to_config() is the plain
+# dict handed to runner.run_assistant / the job queue (it has to cross process
+# and JSON boundaries), containing only the keys the caller set plus timestamp.
+# Keys sent as null are left out, so assistants fall back to their defaults.
+
+import ast
+import os
+from datetime import datetime
+from typing import List, Literal, Optional, Union
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+ASSISTANTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assistants")
+
+
+def defines_run(path):
+    """True when the module source has a top-level run() (parsed, not imported)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "run":
+            return True
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "run" for t in node.targets):
+            return True
+    return False
+
+
+def assistant_names(folder=ASSISTANTS_DIR):
+    return sorted(
+        f[:-3] for f in os.listdir(folder)
+        if f.endswith(".py") and not f.startswith("__") and defines_run(os.path.join(folder, f))
+    )
+
+
+# Registry of runnable assistants, scanned once at import
+TASK_TYPES = set(assistant_names())
+
+
+def register_task_type(name, model=None):
+    """Accepts `name` as a task_type from now on, optionally with its config model."""
+    TASK_TYPES.add(name)
+    if model is not None:
+        CONFIG_MODELS[name] = model
+
+
+def check_url(value, required=True):
+    if not value:
+        if required:
+            raise ValueError("url is required")
+        return value
+    parts = urlsplit(value)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        raise ValueError(f"not an http(s) URL: {value!r}")
+    return value
+
+
+class BaseAssistantConfig(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    task_type: str
+    prompt: str = ""
+    filters: str = ""
+    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    deadline_seconds: Optional[float] = Field(default=None, ge=0)  # 0 = no deadline
+    execution: Optional[Literal["process", "inline"]] = None
+    run_timeout: Optional[float] = Field(default=None, gt=0)
+    priority: Optional[int] = None
+    max_attempts: Optional[int] = Field(default=None, ge=1)
+
+    @model_validator(mode="before")
+    @classmethod
+    def drop_runtime_keys(cls, data):
+        # deadline_at is stamped by the backend when a run starts; one left in a saved
+        # config (older versions wrote it) would stop a re-submitted run straight away
+        if isinstance(data, dict) and "deadline_at" in data:
+            data = {k: v for k, v in data.items() if k != "deadline_at"}
+        return data
+
+    @field_validator("task_type")
+    @classmethod
+    def known_task_type(cls, value):
+        if value not in TASK_TYPES:
+            raise ValueError(f"unknown task_type {value!r}; available: {', '.join(sorted(TASK_TYPES))}")
+        return value
+
+    def to_config(self):
+        config = self.model_dump(mode="json", exclude_unset=True, exclude_none=True)
+        config.setdefault("timestamp", self.timestamp)
+        return config
+
+
+class WebScraperConfig(BaseAssistantConfig):
+    url: str
+    pages: int = Field(default=1, ge=1)
+    selectors: str = "selectors.json"
+    use_browser: Union[bool, Literal["auto"]] = False
+    callback_url: Optional[str] = None
+    crawl: bool = False
+    next_selector: Optional[str] = None
+    link_patterns: List[str] = []
+    max_pages: Optional[int] = Field(default=None, ge=1)
+    max_depth: Optional[int] = Field(default=None, ge=0)
+    incremental: bool = False
+    snapshot: bool = False
+    key_fields: List[str] = ["title"]
+    state_dir: Optional[str] = None
+
+    @field_validator("url")
+    @classmethod
+    def valid_url(cls, value):
+        return check_url(value)
+
+    @field_validator("callback_url")
+    @classmethod
+    def valid_callback(cls, value):
+        return check_url(value, required=False)
+
+
+class ApiFetcherConfig(BaseAssistantConfig):
+    url: str
+    timeout: float = Field(default=30, gt=0)
+
+    @field_validator("url")
+    @classmethod
+    def valid_url(cls, value):
+        return check_url(value)
+
+
+class AssistantChainerConfig(BaseAssistantConfig):
+    url: str = ""
+
+    @field_validator("url")
+    @classmethod
+    def valid_url(cls, value):
+        return check_url(value, required=False)
+
+
+class BlueprintGeneratorConfig(BaseAssistantConfig):
+    uploaded_kep_csv: str = Field(min_length=1)
+
+
+class SeoBlueprintGeneratorConfig(BaseAssistantConfig):
+    uploaded_csv: str = Field(min_length=1)
+    assistant_name: str = "SEO_Optimization_Assistant"
+    output_dir: str = "outputs"
+
+
+class KepConfig(BaseAssistantConfig):
+    course_title: str = ""
+    module_title: str = ""
+    lesson_titles: Union[List[str], str] = []
+    assistant_name: str = "SEO_Optimization_Assistant"
+
+
+class CsvSplitterConfig(BaseAssistantConfig):
+    input_file: Optional[str] = None
+    mode: Literal["rows", "bytes", "hash", "value"] = "rows"
+    rows_per_shard: int = Field(default=100_000, ge=1)
+    max_shard_bytes: int = Field(default=100 * 1024 * 1024, ge=1024)
+    key_column: Optional[str] = None
+    shards: int = Field(default=8, ge=1, le=4096)
+    max_open_shards: int = Field(default=64, ge=1)
+    delimiter: str = Field(default=",", min_length=1, max_length=1)
+    gzip: bool = False
+    output_dir: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_inputs(self):
+        if not (self.input_file or getattr(self, "uploaded_csv", None) or getattr(self, "chained_input", None)):
+            raise ValueError("input_file is required")
+        if self.mode in ("hash", "value") and not self.key_column:
+            raise ValueError(f"mode '{self.mode}' needs a key_column")
+        return self
+
+
+class ClaritySummarizerConfig(BaseAssistantConfig):
+    input_files: Union[List[str], str, None] = None
+    input_glob: Optional[str] = None
+    summary_sentences: int = Field(default=3, ge=1, le=50)
+    top_values: int = Field(default=5, ge=1, le=100)
+    cache_dir: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_inputs(self):
+        if not (self.input_files or self.input_glob or getattr(self, "chained_input", None)):
+            raise ValueError("input_files, input_glob or chained_input is required")
+        return self
+
+
+CONFIG_MODELS = {
+    "web_scraper": WebScraperConfig,
+    "api_fetcher": ApiFetcherConfig,
+    "assistant_chainer": AssistantChainerConfig,
+    "blueprint_generator": BlueprintGeneratorConfig,
+    "seo_blueprint_generator": SeoBlueprintGeneratorConfig,
+    "seo_kep_extractor": KepConfig,
+    "gpt_kep": KepConfig,
+    "csv_splitter": CsvSplitterConfig,
+    "clarity_summarizer": ClaritySummarizerConfig,
+}
+
+
+def config_model(task_type):
+    return CONFIG_MODELS.get(task_type, BaseAssistantConfig)
+
+
+def validate_config(raw):
+    """Validates a raw request body; raises pydantic.ValidationError on bad input."""
+    if not isinstance(raw, dict):
+        return BaseAssistantConfig.model_validate(raw)  # raises: body must be an object
+    return config_model(raw.get("task_type")).model_validate(raw)
@@ -0,0 +1,47 @@
+# core/fast_json.py - Fast JSON encoding for the API (orjson when installed)
+#
+# FastJSONResponse is the backend's default response class and loads() parses
+# request bodies; both use orjson when it is available and fall back to the
+# standard library otherwise. Output is always compact (no indentation), and
+# responses over COMPACT_MIN_BYTES are gzip-compressed by the GZip middleware
+# main.py installs with that threshold.
+
+import json
+import os
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+COMPACT_MIN_BYTES = int(os.getenv("ASSISTANT_COMPACT_MIN_BYTES", str(64 * 1024)))
+
+
+def _default(value):
+    # numpy / pandas scalars, datetimes, paths ... anything else becomes a string
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(value):
+    """Compact JSON as bytes."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    """Parses JSON bytes / str; raises ValueError on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return dumps(content)
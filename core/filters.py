@@ -0,0 +1,299 @@
+# core/filters.py - Compiled, field-aware filter expressions for scraped items
+#
+# Syntax (case-insensitive keywords, commas mean "and"):
+#   dell, 2-in-1, men's         plain keyword lists (no operators) keep the old behaviour:
+#                               every comma-separated part is a title substring
+#   price, rating               ... except known field names, which mean "field is present"
+#   title contains "gaming"     substring match on any field
+#   title ~ /rtx ?40[0-9]0/i    regex match (also: title matches "rtx")
+#   price < 500, rating >= 4    numeric comparisons (<, <=, >, >=, ==, !=)
+#   (dell or hp) and not refurbished
+#
+# compile_filter() parses once per run. The whole expression is evaluated per
+# item against lazily extracted fields, cheapest predicates first, so a rejected
+# item skips the remaining field extraction and price cleaning.
+
+import operator
+import re
+
+NUMERIC_OPS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+KEYWORDS = {"and", "or", "not", "contains", "matches"}
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+# Anything that makes a filter an expression rather than a plain keyword list
+OPERATOR_RE = re.compile(r"""[<>=~()"/]|!=|(?<![\w'])'|\b(?:and|or|not|contains|matches)\b""", re.IGNORECASE)
+
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<regex>/(?:[^/\\]|\\.)+/[imsx]*)
+      | (?P<op><=|>=|==|!=|<|>|~|=)
+      | (?P<punct>[(),])
+      | (?P<number>-?\d+(?:\.\d+)?(?![\w.]))
+      | (?P<word>(?:[^\s"'(),<>=!~]|!(?!=))(?:[^\s"(),<>=!~]|!(?!=))*)
+    )""", re.VERBOSE)
+
+
+def to_number(text):
+    """First number in a text like '$1,299.99' -> 1299.99, or None."""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = NUMBER_RE.search(str(text).replace(",", ""))
+    return float(match.group()) if match else None
+
+
+class Substring:
+    cost = 1
+
+    def __init__(self, field, text):
+        self.field, self.text = field, text.lower()
+        self.fields = {field}
+
+    def eval_item(self, get):
+        return self.text in (get(self.field) or "").lower()
+
+
+class Present(Substring):
+    def __init__(self, field):
+        super().__init__(field, "")
+
+    def eval_item(self, get):
+        return bool(get(self.field))
+
+
+class Regex:
+    cost = 3
+
+    def __init__(self, field, pattern, flags=0):
+        self.field, self.pattern, self.flags = field, pattern, flags
+        self.compiled = re.compile(pattern, flags)
+        self.fields = {field}
+
+    def eval_item(self, get):
+        return bool(self.compiled.search(get(self.field) or ""))
+
+
+class Compare:
+    cost = 2
+
+    def __init__(self, field, op, value):
+        self.field, self.op, self.value = field, op, value
+        self.fn = NUMERIC_OPS[op]
+        self.fields = {field}
+
+    def eval_item(self, get):
+        number = to_number(get(self.field))
+        return number is not None and self.fn(number, self.value)
+
+
+class And:
+    def __init__(self, children):
+        # Cheapest predicates first so most items are rejected early
+        self.children = sorted(children, key=lambda c: c.cost)
+        self.fields = set().union(*(c.fields for c in children))
+        self.cost = sum(c.cost for c in children)
+
+    def eval_item(self, get):
+        return all(c.eval_item(get) for c in self.children)
+
+
+class Or(And):
+    def eval_item(self, get):
+        return any(c.eval_item(get) for c in self.children)
+
+
+class Not:
+    def __init__(self, child):
+        self.child = child
+        self.fields = child.fields
+        self.cost = child.cost
+
+    def eval_item(self, get):
+        return not self.child.eval_item(get)
+
+
+class FilterSyntaxError(ValueError):
+    pass
+
+
+class _Parser:
+    def __init__(self, text, fields):
+        self.fields = fields
+        self.text = text.strip()
+        self.spans = []  # (start, end) of each token in self.text
+        self.tokens = self._tokenize(self.text)
+        self.pos = 0
+
+    def _tokenize(self, text):
+        tokens, pos = [], 0
+        while pos < len(text):
+            match = TOKEN_RE.match(text, pos)
+            if not match or match.end() == pos:
+                raise FilterSyntaxError(f"Unexpected character at {pos}: {text[pos:pos + 10]!r}")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "word" and value.lower() in KEYWORDS:
+                kind, value = "keyword", value.lower()
+            tokens.append((kind, value))
+            self.spans.append((match.start(match.lastgroup), match.end()))
+            pos = match.end()
+        return tokens
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, kind, value=None):
+        token = self.take()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise FilterSyntaxError(f"Expected {value or kind}, got {token[1]!r}")
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return None
+        node = self.parse_or()
+        if self.pos < len(self.tokens):
+            raise FilterSyntaxError(f"Unexpected {self.peek()[1]!r}")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == ("keyword", "or"):
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() in (("keyword", "and"), ("punct", ",")):
+            self.take()
+            if self.peek()[0] is None:  # trailing comma
+                break
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not(self):
+        if self.peek() == ("keyword", "not"):
+            self.take()
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.peek()
+        if (kind, value) == ("punct", "("):
+            self.take()
+            node = self.parse_or()
+            self.expect("punct", ")")
+            return node
+        if kind == "word":
+            next_kind, next_value = self.peek(1)
+            if next_kind == "op" or (next_kind, next_value) in (("keyword", "contains"), ("keyword", "matches")):
+                return self.parse_comparison()
+        return self.parse_phrase()
+
+    def parse_comparison(self):
+        field = self._field(self.take()[1])
+        kind, op = self.take()
+        if op in NUMERIC_OPS:
+            number = self.take()
+            value = to_number(number[1]) if number[0] in ("number", "word", "string") else None
+            if value is None:
+                raise FilterSyntaxError(f"{field} {op} needs a number")
+            return Compare(field, op, value)
+        operand_kind, operand = self.take()
+        if op in ("~", "matches"):
+            if operand_kind == "regex":
+                body, _, flag_chars = operand[1:].rpartition("/")
+                flags = 0
+                for ch in flag_chars:
+                    flags |= {"i": re.I, "m": re.M, "s": re.S, "x": re.X}[ch]
+                return self._regex(field, body, flags)
+            if operand_kind in ("string", "word", "number"):
+                return self._regex(field, self._unquote(operand), re.I)
+        elif operand_kind in ("string", "word", "number"):
+            # `contains` and `=` are case-insensitive substring matches
+            return Substring(field, self._unquote(operand))
+        raise FilterSyntaxError(f"Bad operand for {field} {op}: {operand!r}")
+
+    def parse_phrase(self):
+        first = self.pos
+        while self.peek()[0] in ("word", "number", "string"):
+            self.take()
+        if self.pos == first:
+            raise FilterSyntaxError(f"Unexpected {self.peek()[1]!r}")
+        if self.pos - first == 1 and self.tokens[first][0] == "string":
+            return Substring("title", self._unquote(self.tokens[first][1]))
+        # Bare phrases come from the source text, so "2-in-1" stays "2-in-1"
+        phrase = self.text[self.spans[first][0]:self.spans[self.pos - 1][1]]
+        return phrase_node(phrase, self.fields)
+
+    def _field(self, name):
+        name = name.lower()
+        if name not in self.fields:
+            raise FilterSyntaxError(f"Unknown field {name!r} (known: {', '.join(sorted(self.fields))})")
+        return name
+
+    def _regex(self, field, pattern, flags):
+        try:
+            return Regex(field, pattern, flags)
+        except re.error as e:
+            raise FilterSyntaxError(f"Bad regex {pattern!r}: {e}")
+
+    @staticmethod
+    def _unquote(value):
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            return re.sub(r"\\(.)", r"\1", value[1:-1])
+        return value
+
+
+def phrase_node(phrase, fields):
+    """A known field name means "field is present"; anything else is a title substring."""
+    if phrase.lower() in fields:
+        return Present(phrase.lower())
+    return Substring("title", phrase)
+
+
+def plain_keywords(text, fields):
+    """Comma-separated keyword list without operators: every part must match."""
+    parts = [phrase_node(p.strip(), fields) for p in text.split(",") if p.strip()]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else And(parts)
+
+
+class ItemFilter:
+    """A compiled filter, evaluated per item against lazily extracted fields."""
+
+    def __init__(self, expr=None):
+        self.expr = expr
+        self.fields = expr.fields if expr else set()
+
+    def __bool__(self):
+        return self.expr is not None
+
+    def accepts(self, get):
+        """`get(field)` returns the field text; only the fields the filter needs are asked for."""
+        return self.expr is None or self.expr.eval_item(get)
+
+
+def compile_filter(text, fields=("title", "price")):
+    """Parses a filter expression once; raises FilterSyntaxError on bad input."""
+    text = (text or "").strip()
+    fields = {f.lower() for f in fields}
+    if not OPERATOR_RE.search(text):
+        return ItemFilter(plain_keywords(text, fields))
+    return ItemFilter(_Parser(text, fields).parse())
@@ -0,0 +1,84 @@
+# core/frontier.py - Deduplicating URL frontier for link-following crawls
+#
+# URLs are normalized (case, default ports, fragments, tracking params, query
+# order) before being checked against the seen-set, which keeps 8-byte digests
+# instead of full strings so large crawls stay small in memory.
+
+import hashlib
+from collections import deque
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "ref", "ref_", "sessionid", "sid"}
+
+
+def normalize_url(url, base=None):
+    """Canonical form of `url` (resolved against `base`), or None if not http(s)."""
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def url_key(url):
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class UrlFrontier:
+    """FIFO frontier with a compact seen-set plus depth and page budgets.
+
+    Only hosts of the seed URLs are followed unless `same_host=False`.
+    """
+
+    def __init__(self, max_pages=10, max_depth=None, same_host=True):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.same_host = same_host
+        self.hosts = set()
+        self.queue = deque()
+        self.seen = set()
+        self.fetched = 0
+
+    def add(self, url, depth=0, base=None):
+        """Queues a URL if it is new, in scope and within the depth budget."""
+        url = normalize_url(url, base)
+        if not url:
+            return False
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        host = urlsplit(url).netloc
+        if depth == 0:
+            self.hosts.add(host)
+        elif self.same_host and host not in self.hosts:
+            return False
+        key = url_key(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self.queue.append((url, depth))
+        return True
+
+    def pop(self):
+        url, depth = self.queue.popleft()
+        self.fetched += 1
+        return url, depth
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __bool__(self):
+        return bool(self.queue) and self.fetched < self.max_pages
@@ -0,0 +1,263 @@
+# core/job_queue.py - Durable job queue (SQLite, no outside service)
+#
+# POST /jobs enqueues a run; one or more `python backend_api/worker.py`
+# processes claim jobs, run them through runner.run_assistant and report
+# back. A claimed job holds a lease that the worker renews with heartbeats;
+# when a worker dies its lease expires and the job is re-queued (up to
+# max_attempts). Jobs are claimed by priority lane first (per task_type, see
+# ASSISTANT_QUEUE_LANES), then oldest first, so a flood of one assistant
+# doesn't starve a more important one.
+#
+# All workers must run on the same host as the database file: SQLite's WAL
+# mode relies on shared memory and file locks that network filesystems (NFS,
+# SMB) don't provide reliably. Scaling across hosts needs a real broker.
+#
+# Environment settings:
+#   ASSISTANT_QUEUE_DB     path of the queue database (default: state/jobs.db)
+#   ASSISTANT_QUEUE_LANES  priority per task type, e.g. "api_fetcher=10,web_scraper=5"
+#                          (higher runs first, unlisted task types get 0)
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from uuid import uuid4
+
+from core.fast_json import dumps, loads
+
+DEFAULT_DB = os.getenv("ASSISTANT_QUEUE_DB", os.path.join("state", "jobs.db"))
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    task_type TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    config TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    progress TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, priority DESC, enqueued_at);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (state, lease_expires);
+"""
+
+JSON_COLUMNS = ("config", "progress", "result")
+TIME_COLUMNS = ("enqueued_at", "started_at", "finished_at")
+
+
+def lane_priorities():
+    lanes = {}
+    for entry in os.getenv("ASSISTANT_QUEUE_LANES", "").split(","):
+        if "=" in entry:
+            task_type, priority = entry.split("=", 1)
+            lanes[task_type.strip()] = int(priority)
+    return lanes
+
+
+def _row_to_job(row):
+    job = dict(row)
+    for column in JSON_COLUMNS:
+        if job.get(column) is not None:
+            job[column] = loads(job[column])
+    for column in TIME_COLUMNS:
+        if job.get(column) is not None:
+            job[column] = datetime.fromtimestamp(job[column]).isoformat()
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+class JobQueue:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.local = threading.local()
+        self._db().executescript(SCHEMA)
+
+    def _db(self):
+        # One connection per thread; WAL lets the API read while workers write
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    @contextmanager
+    def _tx(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, config, priority=None, max_attempts=None):
+        task_type = config.get("task_type")
+        if priority is None:
+            priority = config.get("priority", lane_priorities().get(task_type, 0))
+        job_id = uuid4().hex
+        with self._tx() as db:
+            db.execute(
+                "INSERT INTO jobs (job_id, task_type, priority, config, state, max_attempts, enqueued_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, task_type, int(priority), dumps(config).decode(),
+                 int(max_attempts or config.get("max_attempts", DEFAULT_MAX_ATTEMPTS)), time.time()),
+            )
+        return self.get(job_id)
+
+    def _requeue_expired(self, db, now):
+        """Leases that ran out go back to the queue, or fail once out of attempts."""
+        db.execute(
+            "UPDATE jobs SET state = 'cancelled', finished_at = ?, worker = NULL, lease_expires = NULL "
+            "WHERE state = 'leased' AND lease_expires < ? AND cancel_requested",
+            (now, now),
+        )
+        db.execute(
+            "UPDATE jobs SET state = 'failed', finished_at = ?, worker = NULL, lease_expires = NULL, "
+            "error = 'lease expired (worker lost) after ' || attempts || ' attempts' "
+            "WHERE state = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now),
+        )
+        return db.execute(
+            "UPDATE jobs SET state = 'queued', worker = NULL, lease_expires = NULL "
+            "WHERE state = 'leased' AND lease_expires < ?",
+            (now,),
+        ).rowcount
+
+    def requeue_expired(self):
+        with self._tx() as db:
+            return self._requeue_expired(db, time.time())
+
+    def claim(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, task_types=None):
+        """Leases the highest-priority, oldest queued job (optionally only some task types)."""
+        now = time.time()
+        with self._tx() as db:
+            self._requeue_expired(db, now)
+            sql = "SELECT job_id FROM jobs WHERE state = 'queued'"
+            params = []
+            if task_types:
+                sql += f" AND task_type IN ({','.join('?' * len(task_types))})"
+                params.extend(task_types)
+            row = db.execute(sql + " ORDER BY priority DESC, enqueued_at LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "started_at = ? WHERE job_id = ?",
+                (worker, now + lease_seconds, now, row["job_id"]),
+            )
+        return self.get(row["job_id"])
+
+    def heartbeat(self, job_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS, progress=None):
+        """Renews the lease. Returns "ok", "cancel" (cancel requested) or "lost" (lease gone)."""
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT cancel_requested FROM jobs WHERE job_id = ? AND state = 'leased' AND worker = ?",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return "lost"
+            db.execute(
+                "UPDATE jobs SET lease_expires = ?, progress = COALESCE(?, progress) WHERE job_id = ?",
+                (time.time() + lease_seconds, dumps(progress).decode() if progress else None, job_id),
+            )
+        return "cancel" if row["cancel_requested"] else "ok"
+
+    def complete(self, job_id, worker, result, state="succeeded"):
+        """Records the result; ignored if the lease was lost to another worker meanwhile."""
+        with self._tx() as db:
+            return db.execute(
+                "UPDATE jobs SET state = ?, result = ?, finished_at = ?, lease_expires = NULL "
+                "WHERE job_id = ? AND state = 'leased' AND worker = ?",
+                (state, dumps(result).decode(), time.time(), job_id, worker),
+            ).rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        """Re-queues a crashed job while it has attempts left, otherwise marks it failed."""
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT attempts, max_attempts, cancel_requested FROM jobs "
+                "WHERE job_id = ? AND state = 'leased' AND worker = ?",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return None
+            retry = row["attempts"] < row["max_attempts"] and not row["cancel_requested"]
+            db.execute(
+                "UPDATE jobs SET state = ?, error = ?, worker = NULL, lease_expires = NULL, finished_at = ? "
+                "WHERE job_id = ?",
+                ("queued" if retry else "failed", str(error), None if retry else time.time(), job_id),
+            )
+        return "queued" if retry else "failed"
+
+    def cancel(self, job_id):
+        """Cancels a queued job outright; a leased one is told to stop on its next heartbeat."""
+        with self._tx() as db:
+            row = db.execute("SELECT state FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            if row["state"] == "queued":
+                db.execute(
+                    "UPDATE jobs SET state = 'cancelled', finished_at = ?, cancel_requested = 1, "
+                    "result = ? WHERE job_id = ?",
+                    (time.time(), dumps({"status": "⚠️ Cancelled before start"}).decode(), job_id),
+                )
+            elif row["state"] == "leased":
+                db.execute("UPDATE jobs SET cancel_requested = 1 WHERE job_id = ?", (job_id,))
+        return self.get(job_id)
+
+    def get(self, job_id):
+        row = self._db().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list(self, limit=50, state=None):
+        sql, params = "SELECT * FROM jobs", []
+        if state:
+            sql += " WHERE state = ?"
+            params.append(state)
+        rows = self._db().execute(sql + " ORDER BY enqueued_at DESC LIMIT ?", params + [limit]).fetchall()
+        return [{k: v for k, v in _row_to_job(r).items() if k not in ("config", "result")} for r in rows]
+
+    def stats(self):
+        rows = self._db().execute(
+            "SELECT task_type, state, COUNT(*) AS n FROM jobs GROUP BY task_type, state"
+        ).fetchall()
+        by_lane = {}
+        for r in rows:
+            by_lane.setdefault(r["task_type"], {})[r["state"]] = r["n"]
+        oldest = self._db().execute("SELECT MIN(enqueued_at) FROM jobs WHERE state = 'queued'").fetchone()[0]
+        return {
+            "lanes": by_lane,
+            "priorities": lane_priorities(),
+            "oldest_queued_seconds": round(time.time() - oldest, 1) if oldest else None,
+        }
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(DEFAULT_DB)
+        return _queue
@@ -0,0 +1,67 @@
+# core/progress.py - Progress events reported by running assistants
+#
+# Assistants call report_progress(stage=..., pages_fetched=..., rows_emitted=...,
+# error=...) while they work. The caller that started the run installs a
+# reporter with use_reporter(); outside a tracked run the call is a no-op.
+# ProgressBuffer is the bounded per-run ring buffer the backend streams from,
+# so late subscribers can still catch up on the most recent events.
+
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_reporter = contextvars.ContextVar("assistant_progress_reporter", default=None)
+
+
+def report_progress(stage=None, **fields):
+    """Emits a progress event for the current run (if anyone is listening)."""
+    reporter = _reporter.get()
+    if reporter is None:
+        return
+    event = {"stage": stage, "ts": time.time(), **{k: v for k, v in fields.items() if v is not None}}
+    try:
+        reporter(event)
+    except Exception as e:
+        # Progress must never break the run itself
+        print(f"⚠️ Progress reporter failed: {e}")
+
+
+def current_reporter():
+    return _reporter.get()
+
+
+@contextmanager
+def use_reporter(reporter):
+    token = _reporter.set(reporter)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
+
+
+class ProgressBuffer:
+    """Thread-safe ring buffer of events with increasing sequence ids."""
+
+    def __init__(self, maxlen=200):
+        self.events = deque(maxlen=maxlen)
+        self.next_id = 1
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def append(self, event):
+        with self.lock:
+            self.events.append({"id": self.next_id, **event})
+            self.next_id += 1
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+
+    def since(self, last_id=0):
+        """Events after `last_id`, plus how many were already evicted from the ring."""
+        with self.lock:
+            events = [e for e in self.events if e["id"] > last_id]
+            oldest = self.events[0]["id"] if self.events else self.next_id
+            return events, max(0, oldest - last_id - 1), self.closed
@@ -0,0 +1,264 @@
+# core/proxy_pool.py - Health-scored proxy pool for the scrapers
+#
+# One long-lived pool per process (get_proxy_pool()) tracks every proxy from
+# proxies.json:
+#   success rate   successes / attempts, with a small prior so new proxies get tried
+#   latency        EWMA of response time for successful fetches
+#   bans           403 / 429 answers: the proxy is ejected straight away
+#   failures       connection errors / 5xx: ejected after EJECT_AFTER in a row
+# Ejected proxies sit out a cool-down that doubles with each ejection in a row
+# (capped), then get a probation pick. Picks are weighted by health, and each
+# host sticks to the proxy that last worked for it (sessions, fewer bans) until
+# that proxy is ejected or the assignment expires.
+#
+# State is saved to state/proxy_pool.json (throttled, and at the end of every
+# run) so health survives restarts and is shared with the API's GET /proxies.
+# Entries are keyed by a hash of the full proxy URL, so gateway proxies that
+# share host:port but differ in username (session / sticky users) keep
+# separate health. Saves merge with the file under a lock: for each proxy the
+# most recently used record wins, in the file and in this process.
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are only serialized within one process
+    fcntl = None
+
+PROXIES_FILE = "proxies.json"
+STATE_FILE = os.path.join("state", "proxy_pool.json")
+EWMA_ALPHA = 0.3
+EJECT_AFTER = 3
+COOLDOWN_SECONDS = 60
+MAX_COOLDOWN_SECONDS = 1800
+STICKY_SECONDS = 600
+SAVE_INTERVAL_SECONDS = 10
+LATENCY_REFERENCE = 1.0  # seconds; a proxy this slow scores half of an instant one
+BAN_STATUSES = {403, 429}
+
+
+def proxy_key(proxy):
+    """Stable id of the full proxy URL (credentials included) that doesn't reveal them."""
+    return hashlib.sha256(proxy.encode("utf-8")).hexdigest()[:16]
+
+
+def proxy_label(proxy):
+    """Proxy URL without credentials, safe for logs and metrics."""
+    parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    host = parts.hostname or proxy
+    return f"{parts.scheme}://{host}:{parts.port}" if parts.port else f"{parts.scheme}://{host}"
+
+
+class ProxyHealth:
+    FIELDS = ("successes", "failures", "bans", "latency_ewma", "consecutive_failures",
+              "ejections", "ejected_until", "last_used", "last_status")
+
+    def __init__(self, proxy, **state):
+        self.proxy = proxy
+        self.successes = 0
+        self.failures = 0
+        self.bans = 0
+        self.latency_ewma = None
+        self.consecutive_failures = 0
+        self.ejections = 0  # ejections in a row; reset by a success
+        self.ejected_until = 0.0
+        self.last_used = None
+        self.last_status = None
+        for key in self.FIELDS:
+            if key in state:
+                setattr(self, key, state[key])
+
+    def available(self, now):
+        return self.ejected_until <= now
+
+    def score(self):
+        attempts = self.successes + self.failures + self.bans
+        success_rate = (self.successes + 1) / (attempts + 2)
+        latency = self.latency_ewma if self.latency_ewma is not None else LATENCY_REFERENCE
+        return success_rate / (1 + latency / LATENCY_REFERENCE)
+
+    def eject(self, now):
+        cooldown = min(COOLDOWN_SECONDS * 2 ** self.ejections, MAX_COOLDOWN_SECONDS)
+        self.ejections += 1
+        self.ejected_until = now + cooldown
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+
+class ProxyPool:
+    def __init__(self, proxies, state_file=STATE_FILE):
+        self.state_file = state_file
+        self.lock = threading.Lock()
+        self.health = {}
+        self.sticky = {}  # host -> (proxy, assigned_at)
+        self.last_save = 0.0
+        self.dirty = False
+        self.save_lock = threading.Lock()
+        saved = self._load_state()
+        self.set_proxies(proxies, saved)
+
+    def _load_state(self):
+        try:
+            with open(self.state_file) as f:
+                return json.load(f).get("proxies", {})
+        except (OSError, ValueError):
+            return {}
+
+    def set_proxies(self, proxies, saved=None):
+        saved = saved or {}
+        with self.lock:
+            self.health = {
+                p: self.health.get(p) or ProxyHealth(p, **saved.get(proxy_key(p), {}))
+                for p in dict.fromkeys(proxies)
+            }
+            self.sticky = {h: v for h, v in self.sticky.items() if v[0] in self.health}
+
+    def __bool__(self):
+        return bool(self.health)
+
+    def pick(self, host=None):
+        """Proxy for a request to `host`, or None when the pool is empty."""
+        now = time.time()
+        with self.lock:
+            if not self.health:
+                return None
+            assigned = self.sticky.get(host)
+            if assigned and now - assigned[1] < STICKY_SECONDS and self.health[assigned[0]].available(now):
+                return assigned[0]
+            candidates = [h for h in self.health.values() if h.available(now)]
+            if not candidates:
+                # Everything is cooling down: give the one closest to release a probation pick
+                return min(self.health.values(), key=lambda h: h.ejected_until).proxy
+            chosen = random.choices(candidates, weights=[h.score() for h in candidates])[0]
+            if host:
+                self.sticky[host] = (chosen.proxy, now)
+            return chosen.proxy
+
+    def record(self, proxy, host=None, ok=True, latency=None, status=None):
+        """Feeds back one request outcome; bans and repeated failures eject the proxy."""
+        now = time.time()
+        with self.lock:
+            h = self.health.get(proxy)
+            if h is None:
+                return
+            h.last_used = now
+            h.last_status = status
+            if status in BAN_STATUSES:
+                h.bans += 1
+                h.consecutive_failures += 1
+                h.eject(now)
+            elif ok:
+                h.successes += 1
+                h.consecutive_failures = 0
+                h.ejections = 0
+                if latency is not None:
+                    h.latency_ewma = latency if h.latency_ewma is None else (
+                        EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * h.latency_ewma)
+                if host:
+                    self.sticky[host] = (proxy, now)
+            else:
+                h.failures += 1
+                h.consecutive_failures += 1
+                if h.consecutive_failures >= EJECT_AFTER:
+                    h.eject(now)
+            if not h.available(now) and host and self.sticky.get(host, (None,))[0] == proxy:
+                del self.sticky[host]
+            self.dirty = True
+        if now - self.last_save > SAVE_INTERVAL_SECONDS:
+            self.save()
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            self.last_save = time.time()
+        try:
+            if os.path.dirname(self.state_file):
+                os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with self.save_lock, open(self.state_file + ".lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                merged = self._merge(self._load_state())
+                tmp = f"{self.state_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump({"saved_at": time.time(), "proxies": merged}, f, indent=1)
+                os.replace(tmp, self.state_file)
+        except OSError as e:
+            print(f"⚠️ Could not save proxy state: {e}")
+
+    def _merge(self, saved):
+        """Newest record per proxy wins: ours go to the file, newer ones from other processes come back."""
+        with self.lock:
+            for p, h in self.health.items():
+                key = proxy_key(p)
+                theirs = saved.get(key)
+                if theirs and (theirs.get("last_used") or 0) > (h.last_used or 0):
+                    self.health[p] = ProxyHealth(p, **theirs)
+                else:
+                    saved[key] = {"label": proxy_label(p), **h.to_dict()}
+        return saved
+
+    def metrics(self):
+        now = time.time()
+        with self.lock:
+            return [
+                {
+                    "id": proxy_key(p),
+                    "proxy": proxy_label(p),
+                    "available": h.available(now),
+                    "cooldown_seconds": round(max(0.0, h.ejected_until - now), 1),
+                    "score": round(h.score(), 4),
+                    "success_rate": round(h.successes / max(1, h.successes + h.failures + h.bans), 4),
+                    "latency_ewma": round(h.latency_ewma, 3) if h.latency_ewma is not None else None,
+                    "successes": h.successes,
+                    "failures": h.failures,
+                    "bans": h.bans,
+                    "sticky_hosts": sum(1 for v in self.sticky.values() if v[0] == p),
+                }
+                for p, h in self.health.items()
+            ]
+
+
+def load_proxies(path=PROXIES_FILE):
+    try:
+        with open(path) as f:
+            return [p for p in json.load(f) if isinstance(p, str) and p]
+    except (OSError, ValueError):
+        return []
+
+
+_pool = None
+_pool_mtime = None
+_pool_lock = threading.Lock()
+
+
+def get_proxy_pool(path=PROXIES_FILE):
+    """The process-wide pool; proxies.json is only re-read when it changes."""
+    global _pool, _pool_mtime
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProxyPool(load_proxies(path))
+        elif mtime != _pool_mtime:
+            _pool.set_proxies(load_proxies(path), _pool._load_state())
+        _pool_mtime = mtime
+        return _pool
+
+
+def proxy_metrics(path=PROXIES_FILE):
+    """Health per proxy as last saved by any process (scrapers may run in pool workers)."""
+    if _pool is not None:
+        _pool.save()
+    pool = ProxyPool(load_proxies(path))
+    return {"proxies": pool.metrics(), "state_file": pool.state_file}
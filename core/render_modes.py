@@ -0,0 +1,52 @@
+# core/render_modes.py - Remembered per-host fetch mode for use_browser="auto"
+#
+# In auto mode the scraper tries a plain HTTP fetch first and only renders the
+# page in a headless browser when the item selector matches nothing. The
+# outcome is stored per host ("http" or "browser") so later pages and later
+# runs go straight to the right fetcher. Decisions expire after DECISION_TTL
+# so a site that drops (or adds) client-side rendering gets re-checked.
+
+import json
+import os
+import threading
+import time
+
+STATE_FILE = os.path.join("state", "render_modes.json")
+DECISION_TTL = 7 * 86400
+
+
+class RenderModes:
+    def __init__(self, state_file=STATE_FILE, ttl=DECISION_TTL):
+        self.state_file = state_file
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        try:
+            with open(state_file) as f:
+                self.modes = json.load(f)
+        except (OSError, ValueError):
+            self.modes = {}
+
+    def get(self, host):
+        """"http", "browser", or None when the host is undecided (or the decision expired)."""
+        with self.lock:
+            entry = self.modes.get(host)
+        if entry and time.time() - entry.get("decided_at", 0) < self.ttl:
+            return entry["mode"]
+        return None
+
+    def set(self, host, mode):
+        if self.get(host) == mode:
+            return
+        with self.lock:
+            self.modes[host] = {"mode": mode, "decided_at": time.time()}
+            snapshot = dict(self.modes)
+        try:
+            if os.path.dirname(self.state_file):
+                os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp = f"{self.state_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f, indent=1)
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            print(f"⚠️ Could not save render modes: {e}")
+
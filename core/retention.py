@@ -0,0 +1,527 @@
+# core/retention.py - Retention and compaction for run artifacts
+#
+# output/ (including the per-assistant folders output/<assistant>/...),
+# archive/<assistant>/<run_id>/, config/ and the root-level
+# assistant_config_*.json files grow with every run and every saved config.
+# A retention pass groups those artifacts per assistant into runs (files that
+# share the timestamp in their name, e.g. a CSV and its _summary.md) and
+# applies a policy to whole runs:
+#   keep_last     newest N runs are never touched
+#   max_age_days  older runs are retired
+#   max_files     runs past the newest N files are retired
+#   max_bytes     runs past this total size (newest first) are retired
+# output/<assistant>/history.json (the run log) is never retired.
+# Retired CSVs are compacted into zstd Parquet files partitioned as
+# archive/compacted/assistant=<name>/date=<YYYY-MM-DD>/part-*.parquet (with a
+# _source column). Configs and other files are rolled into a new zip per pass,
+# archive/rolled-<stamp>.zip, recorded in one JSON index (archive/rolled_index.json)
+# that names the zip holding each file. Sources are only deleted after their
+# compacted / rolled copy is written and verified, and earlier zips are never
+# rewritten, so a crash mid-roll never touches what is already archived.
+#
+# Policies come from retention.json ({"default": {...}, "<assistant>": {...}})
+# or the file named by ASSISTANT_RETENTION_POLICY. Run a pass with
+#   python -m core.retention --dry-run      (report only)
+#   python -m core.retention                (apply)
+# or let the backend run it every ASSISTANT_RETENTION_INTERVAL seconds.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zipfile
+from collections import defaultdict
+from datetime import datetime
+
+DEFAULT_POLICY = {"keep_last": 5, "max_age_days": 14, "max_files": 200, "max_bytes": 500 * 1024 * 1024}
+# Never touch anything modified this recently (a run may still be writing it)
+MIN_AGE_SECONDS = 600
+LOCK_STALE_SECONDS = 3600
+COMPACT_ROWS_PER_PART = 500_000
+# Run bookkeeping kept next to outputs, not an artifact
+SKIP_OUTPUT_NAMES = ("history.json",)
+
+COMPACTED_DIR = "compacted"
+ROLLED_ZIP = "rolled.zip"  # single archive written by older versions, still readable
+ROLLED_INDEX = "rolled_index.json"
+LOCK_FILE = ".retention.lock"
+
+_TS_COMPACT = re.compile(r"(\d{8})_?(\d{6})")
+_TS_ISO = re.compile(r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):?(\d{2}):?(\d{2})")
+
+
+def compaction_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def load_policies(path=None):
+    path = path or os.getenv("ASSISTANT_RETENTION_POLICY", "retention.json")
+    policies = {"default": dict(DEFAULT_POLICY)}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for name, policy in json.load(f).items():
+                policies[name] = {**policies.get(name, {}), **policy}
+    return policies
+
+
+def policy_for(policies, assistant):
+    return {**policies["default"], **policies.get(assistant, {})}
+
+
+def known_assistants(root="."):
+    folder = os.path.join(root, "assistants")
+    names = [f[:-3] for f in os.listdir(folder) if f.endswith(".py") and not f.startswith("__")] if os.path.isdir(folder) else []
+    # Match the longest name first; outputs often drop the "assistant_" prefix (table_parser_output_...)
+    aliases = {n: n for n in names}
+    aliases.update({n[len("assistant_"):]: n for n in names if n.startswith("assistant_")})
+    return sorted(aliases.items(), key=lambda kv: -len(kv[0]))
+
+
+def assistant_for(name, assistants):
+    for alias, assistant in assistants:
+        if alias in name:
+            return assistant
+    return "other"
+
+
+def run_key_for(name):
+    """The timestamp text in a file name; artifacts of one run share it."""
+    m = _TS_ISO.search(name) or _TS_COMPACT.search(name)
+    return m.group() if m else None
+
+
+def timestamp_for(name, fallback):
+    m = _TS_ISO.search(name)
+    if m:
+        return datetime(*map(int, m.groups())).timestamp()
+    m = _TS_COMPACT.search(name)
+    if m:
+        try:
+            return datetime.strptime("".join(m.groups()), "%Y%m%d%H%M%S").timestamp()
+        except ValueError:
+            pass
+    return fallback
+
+
+def tree_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path), os.path.getmtime(path)
+    size, mtime = 0, 0
+    for dirpath, _, files in os.walk(path):
+        for f in files:
+            st = os.stat(os.path.join(dirpath, f))
+            size += st.st_size
+            mtime = max(mtime, st.st_mtime)
+    return size, mtime
+
+
+def scan_artifacts(root="."):
+    """Every retention candidate as a dict: path, kind, assistant, run, ts, mtime, bytes."""
+    assistants = known_assistants(root)
+    candidates = []
+
+    def add(path, kind, assistant=None):
+        size, mtime = tree_size(path)
+        name = os.path.basename(path)
+        candidates.append({
+            "path": path, "kind": kind,
+            "assistant": assistant or assistant_for(name, assistants),
+            "run": run_key_for(name) or path,
+            "ts": timestamp_for(name, mtime), "mtime": mtime, "bytes": size,
+        })
+
+    output_dir = os.path.join(root, "output")
+    if os.path.isdir(output_dir):
+        aliases = dict(assistants)
+        for entry in os.scandir(output_dir):
+            if entry.is_file():
+                add(entry.path, "output")
+            elif entry.is_dir() and not entry.name.startswith("."):
+                # output/<assistant>/: files and per-run folders (csv_splitter)
+                folder_assistant = aliases.get(entry.name, entry.name)
+                for sub in os.scandir(entry.path):
+                    if not sub.name.startswith(SKIP_OUTPUT_NAMES + (".",)):
+                        add(sub.path, "output", folder_assistant)
+
+    config_dir = os.path.join(root, "config")
+    if os.path.isdir(config_dir):
+        for entry in os.scandir(config_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                add(entry.path, "config")
+
+    for entry in os.scandir(root):
+        if entry.is_file() and entry.name.startswith("assistant_config_") and entry.name.endswith(".json"):
+            add(entry.path, "config")
+
+    archive_dir = os.path.join(root, "archive")
+    if os.path.isdir(archive_dir):
+        for assistant_entry in os.scandir(archive_dir):
+            if not assistant_entry.is_dir() or assistant_entry.name == COMPACTED_DIR or assistant_entry.name.startswith("."):
+                continue
+            for run_entry in os.scandir(assistant_entry.path):
+                if run_entry.is_dir():
+                    add(run_entry.path, "archive_run", assistant_entry.name)
+    return candidates
+
+
+def plan_retention(candidates, policies, now=None):
+    """Splits candidates into (keep, retire); each retired item gets a `reason`.
+
+    Decisions are made per run, so a run's files are kept or retired together.
+    """
+    now = now or time.time()
+    groups = defaultdict(lambda: defaultdict(list))
+    for c in candidates:
+        groups[(c["assistant"], c["kind"])][c.get("run") or c["path"]].append(c)
+
+    keep, retire = [], []
+    for (assistant, _), runs in groups.items():
+        policy = policy_for(policies, assistant)
+        max_age = policy.get("max_age_days")
+        max_files = policy.get("max_files")
+        max_bytes = policy.get("max_bytes")
+        kept_files, kept_bytes = 0, 0
+        ordered = sorted(runs.values(), key=lambda items: max(c["ts"] for c in items), reverse=True)
+        for i, items in enumerate(ordered):
+            ts = max(c["ts"] for c in items)
+            mtime = max(c["mtime"] for c in items)
+            size = sum(c["bytes"] for c in items)
+            reason = None
+            if i >= policy.get("keep_last", 0) and now - mtime >= MIN_AGE_SECONDS:
+                if max_age is not None and now - ts > max_age * 86400:
+                    reason = "age"
+                elif max_files is not None and kept_files + len(items) > max_files:
+                    reason = "count"
+                elif max_bytes is not None and kept_bytes + size > max_bytes:
+                    reason = "bytes"
+            if reason:
+                retire.extend({**item, "reason": reason} for item in items)
+            else:
+                keep.extend(items)
+                kept_files += len(items)
+                kept_bytes += size
+    return keep, retire
+
+
+def relative(path, root):
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def split_retired(retire, root, compact):
+    """Maps retired artifacts to CSV compaction groups and files to roll into the zip."""
+    csv_groups = defaultdict(list)  # (assistant, date) -> [(arcname, path, item)]
+    to_roll = []  # (arcname, path, item)
+    for item in retire:
+        paths = [item["path"]]
+        if os.path.isdir(item["path"]):
+            paths = [os.path.join(d, f) for d, _, files in os.walk(item["path"]) for f in files]
+        for path in paths:
+            if compact and path.endswith(".csv"):
+                date = datetime.fromtimestamp(item["ts"]).strftime("%Y-%m-%d")
+                csv_groups[(item["assistant"], date)].append((relative(path, root), path, item))
+            else:
+                to_roll.append((relative(path, root), path, item))
+    return csv_groups, to_roll
+
+
+def compact_csvs(group_key, sources, root, stamp):
+    """Writes one or more Parquet parts for a group. Returns (parts, written_paths, unreadable)."""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    assistant, date = group_key
+    part_dir = os.path.join(root, "archive", COMPACTED_DIR, f"assistant={assistant}", f"date={date}")
+    os.makedirs(part_dir, exist_ok=True)
+    parts, written, unreadable = [], [], []
+    frames, rows, batch = [], 0, []
+
+    def flush():
+        nonlocal frames, rows, batch
+        if not frames:
+            return
+        # Runs don't share a schema, so columns are unioned and stored as strings
+        df = pd.concat(frames, ignore_index=True, sort=False).astype("string")
+        part = os.path.join(part_dir, f"part-{stamp}-{len(parts):03d}.parquet")
+        tmp = part + ".tmp"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="zstd")
+        if pq.read_metadata(tmp).num_rows != len(df):
+            os.remove(tmp)
+            raise IOError(f"Compacted part {part} failed verification")
+        os.replace(tmp, part)
+        parts.append({"part": relative(part, root), "rows": len(df), "bytes": os.path.getsize(part)})
+        written.extend(batch)
+        frames, rows, batch = [], 0, []
+
+    for source, path, item in sources:
+        try:
+            df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        except Exception:
+            unreadable.append((source, path, item))  # empty / malformed CSVs are rolled as-is
+            continue
+        df.insert(0, "_source", source)
+        frames.append(df)
+        rows += len(df)
+        batch.append(path)
+        if rows >= COMPACT_ROWS_PER_PART:
+            flush()
+    flush()
+    return parts, written, unreadable
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_rolled_index(root="."):
+    path = os.path.join(root, "archive", ROLLED_INDEX)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def roll_files(to_roll, root, stamp=None):
+    """Writes files to a new archive/rolled-<stamp>.zip and records them in the index. Returns rolled paths.
+
+    Each pass gets its own zip, so the cost is the size of what is rolled now,
+    not of everything rolled before. The zip is written as .tmp, verified and
+    renamed before the index points at it.
+    """
+    if not to_roll:
+        return []
+    archive_dir = os.path.join(root, "archive")
+    os.makedirs(archive_dir, exist_ok=True)
+    index = load_rolled_index(root)
+    stamp = stamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    zip_name = f"rolled-{stamp}.zip"
+    n = 1
+    while os.path.exists(os.path.join(archive_dir, zip_name)):
+        n += 1
+        zip_name = f"rolled-{stamp}-{n}.zip"
+    zip_path = os.path.join(archive_dir, zip_name)
+    tmp_zip = zip_path + ".tmp"
+    entries, rolled = {}, []
+    try:
+        with zipfile.ZipFile(tmp_zip, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for arcname, path, item in to_roll:
+                if arcname in index:
+                    arcname = f"{arcname}.{int(time.time())}"  # same name rolled before
+                zf.write(path, arcname)
+                entries[arcname] = {
+                    "source": arcname, "zip": zip_name, "assistant": item["assistant"], "kind": item["kind"],
+                    "timestamp": datetime.fromtimestamp(item["ts"]).isoformat(),
+                    "bytes": os.path.getsize(path), "sha256": file_digest(path),
+                    "rolled_at": datetime.now().isoformat(),
+                }
+                rolled.append(path)
+        with zipfile.ZipFile(tmp_zip) as zf:
+            if zf.testzip() is not None:
+                raise IOError(f"{zip_name} failed verification")
+        os.replace(tmp_zip, zip_path)
+    finally:
+        if os.path.exists(tmp_zip):
+            os.remove(tmp_zip)
+    index.update(entries)
+    tmp = os.path.join(archive_dir, ROLLED_INDEX + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, os.path.join(archive_dir, ROLLED_INDEX))
+    return rolled
+
+
+def read_rolled(arcname, root="."):
+    """Contents of a rolled file, looked up through the index."""
+    entry = load_rolled_index(root).get(arcname)
+    if entry is None:
+        raise KeyError(arcname)
+    with zipfile.ZipFile(os.path.join(root, "archive", entry.get("zip", ROLLED_ZIP))) as zf:
+        return zf.read(arcname)
+
+
+def acquire_lock(root):
+    """Cross-process lock so only one API worker runs a pass at a time."""
+    os.makedirs(os.path.join(root, "archive"), exist_ok=True)
+    path = os.path.join(root, "archive", LOCK_FILE)
+    try:
+        if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return path
+    except FileExistsError:
+        return None
+
+
+def remove_source(item):
+    if os.path.isdir(item["path"]):
+        shutil.rmtree(item["path"], ignore_errors=True)
+    elif os.path.exists(item["path"]):
+        os.remove(item["path"])
+
+
+def summarize(candidates, retire):
+    assistants = defaultdict(lambda: {"files": 0, "bytes": 0, "retire": 0, "retire_bytes": 0, "reasons": defaultdict(int)})
+    for c in candidates:
+        assistants[c["assistant"]]["files"] += 1
+        assistants[c["assistant"]]["bytes"] += c["bytes"]
+    for r in retire:
+        entry = assistants[r["assistant"]]
+        entry["retire"] += 1
+        entry["retire_bytes"] += r["bytes"]
+        entry["reasons"][r["reason"]] += 1
+    return {a: {**v, "reasons": dict(v["reasons"])} for a, v in sorted(assistants.items())}
+
+
+def run_retention(root=".", policies=None, dry_run=True, now=None):
+    """One retention pass. Returns a report; with dry_run nothing is written or deleted."""
+    policies = policies or load_policies()
+    compact = compaction_available()
+    candidates = scan_artifacts(root)
+    _, retire = plan_retention(candidates, policies, now)
+    report = {
+        "status": "✅ Dry run" if dry_run else "✅ Success",
+        "dry_run": dry_run,
+        "generated_at": datetime.now().isoformat(),
+        "compaction": "parquet" if compact else "zip (pyarrow not installed)",
+        "assistants": summarize(candidates, retire),
+        "actions": [
+            {"path": relative(r["path"], root), "kind": r["kind"], "assistant": r["assistant"],
+             "reason": r["reason"], "bytes": r["bytes"]}
+            for r in retire
+        ],
+        "bytes_retired": sum(r["bytes"] for r in retire),
+    }
+    if dry_run or not retire:
+        return report
+
+    lock = acquire_lock(root)
+    if lock is None:
+        return {**report, "status": "⚠️ Skipped – another retention pass is running"}
+    try:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_groups, to_roll = split_retired(retire, root, compact)
+        done_paths, parts, errors = set(), [], []
+        for key, sources in csv_groups.items():
+            try:
+                group_parts, written, unreadable = compact_csvs(key, sources, root, stamp)
+                parts.extend(group_parts)
+                done_paths.update(written)
+                to_roll.extend(unreadable)
+            except Exception as e:
+                errors.append(f"compact {key[0]}/{key[1]}: {e}")
+        try:
+            done_paths.update(roll_files(to_roll, root, stamp))
+        except Exception as e:
+            errors.append(f"roll: {e}")
+
+        # Only remove an artifact when every file in it was compacted or rolled
+        removed, freed = 0, 0
+        for r in retire:
+            files = [r["path"]] if os.path.isfile(r["path"]) else [
+                os.path.join(d, f) for d, _, fs in os.walk(r["path"]) for f in fs]
+            if all(f in done_paths for f in files):
+                remove_source(r)
+                removed += 1
+                freed += r["bytes"]
+        report.update(
+            removed=removed,
+            parts=parts,
+            rolled=len(to_roll),
+            bytes_freed=freed - sum(p["bytes"] for p in parts),
+        )
+        if errors:
+            report["status"] = "⚠️ Completed with errors"
+            report["errors"] = errors
+        return report
+    finally:
+        os.remove(lock)
+
+
+def format_report(report):
+    lines = [f"{report['status']} – {len(report['actions'])} artifacts to retire "
+             f"({report['bytes_retired'] / 1e6:.1f} MB), compaction: {report['compaction']}"]
+    for assistant, s in report["assistants"].items():
+        reasons = ", ".join(f"{k}={v}" for k, v in s["reasons"].items()) or "-"
+        lines.append(f"  {assistant:<24} {s['files']:>6} files {s['bytes'] / 1e6:>9.1f} MB"
+                     f"  retire {s['retire']:>5} ({s['retire_bytes'] / 1e6:.1f} MB)  [{reasons}]")
+    if not report["dry_run"] and "removed" in report:
+        lines.append(f"  removed {report['removed']} artifacts, {len(report['parts'])} parquet parts, "
+                     f"{report['bytes_freed'] / 1e6:.1f} MB freed")
+    for error in report.get("errors", []):
+        lines.append(f"  ❌ {error}")
+    return "\n".join(lines)
+
+
+class RetentionService:
+    """Background thread that runs a retention pass every `interval` seconds."""
+
+    def __init__(self, interval, root=".", policy_path=None):
+        self.interval = interval
+        self.root = root
+        self.policy_path = policy_path
+        self.last_report = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+            self.thread.start()
+        return self
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.last_report = run_retention(self.root, load_policies(self.policy_path), dry_run=False)
+                print(f"🧹 Retention: {format_report(self.last_report).splitlines()[0]}")
+            except Exception as e:
+                print(f"❌ Retention pass failed: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+_service = None
+
+
+def start_service():
+    """Starts the background pass when ASSISTANT_RETENTION_INTERVAL (seconds) is set."""
+    global _service
+    interval = float(os.getenv("ASSISTANT_RETENTION_INTERVAL", "0"))
+    if interval > 0 and _service is None:
+        _service = RetentionService(interval).start()
+    return _service
+
+
+def service_report():
+    return _service.last_report if _service else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retire old outputs, archives and configs.")
+    parser.add_argument("--root", default=".")
+    parser.add_argument("--policy", default=None, help="Policy JSON (default: retention.json)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be retired")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+    report = run_retention(args.root, load_policies(args.policy), dry_run=args.dry_run)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# core/run_client.py - Small HTTP client for the backend's /runs API
+#
+# Used by the Streamlit pages to submit runs and follow their progress events
+# (server-sent events from GET /runs/{run_id}/events) without running the
+# assistant in the page's own script thread.
+
+import json
+import os
+
+import requests
+
+BACKEND_URL = os.getenv("ASSISTANT_API_URL", "http://localhost:8000").rstrip("/")
+
+
+def submit_run(config, base_url=BACKEND_URL, timeout=10):
+    res = requests.post(f"{base_url}/runs", json=config, timeout=timeout)
+    res.raise_for_status()
+    return res.json()
+
+
+def get_run(run_id, base_url=BACKEND_URL, timeout=10):
+    res = requests.get(f"{base_url}/runs/{run_id}", timeout=timeout)
+    res.raise_for_status()
+    return res.json()
+
+
+def stream_events(run_id, base_url=BACKEND_URL, last_event_id=0, timeout=60):
+    """Yields (event_type, data) tuples until the run ends; `timeout` is per read."""
+    headers = {"Accept": "text/event-stream"}
+    if last_event_id:
+        headers["Last-Event-ID"] = str(last_event_id)
+    with requests.get(f"{base_url}/runs/{run_id}/events", headers=headers, stream=True, timeout=timeout) as res:
+        res.raise_for_status()
+        event_type, data_lines = "message", []
+        for line in res.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if line == "":
+                if data_lines:
+                    data = json.loads("\n".join(data_lines))
+                    yield event_type, data
+                    if event_type == "end":
+                        return
+                event_type, data_lines = "message", []
+            elif line.startswith(":"):
+                continue  # keep-alive comment
+            elif line.startswith("event:"):
+                event_type = line[6:].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[5:].strip())
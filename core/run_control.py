@@ -0,0 +1,95 @@
+# core/run_control.py - Run deadlines and cooperative cancellation
+#
+# Every run gets a RunControl holding an optional deadline (wall-clock epoch,
+# so it survives the hop into a pool worker process) and a cancel flag set by
+# DELETE /runs/{run_id}. Assistants never see it directly: they use
+#   fetch_timeout(default)   per-request timeout capped by the time left
+#   interruptible_sleep(s)   retry waits that wake up on cancel / deadline
+#   stop_reason()            "cancelled" / "deadline" at page boundaries
+# which all fall back to "no limit" outside a controlled run.
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+MIN_TIMEOUT = 0.1
+
+
+class RunControl:
+    def __init__(self, deadline_at=None, cancel_event=None):
+        self.deadline_at = deadline_at
+        self.cancel_event = cancel_event or threading.Event()
+
+    @classmethod
+    def from_config(cls, config, cancel_event=None):
+        """Deadline from config["deadline_at"] (epoch) or config["deadline_seconds"] (from now)."""
+        deadline_at = config.get("deadline_at")
+        if deadline_at is None and config.get("deadline_seconds"):
+            deadline_at = time.time() + float(config["deadline_seconds"])
+        return cls(float(deadline_at) if deadline_at is not None else None, cancel_event)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def remaining(self):
+        """Seconds until the deadline (never negative), or None without a deadline."""
+        if self.deadline_at is None:
+            return None
+        return max(0.0, self.deadline_at - time.time())
+
+    def stop_reason(self):
+        if self.cancelled():
+            return "cancelled"
+        if self.deadline_at is not None and time.time() >= self.deadline_at:
+            return "deadline"
+        return None
+
+    def timeout(self, default):
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return max(MIN_TIMEOUT, min(default, remaining) if default else remaining)
+
+    def sleep(self, seconds):
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self.cancel_event.wait(max(0.0, seconds))
+
+
+_control = contextvars.ContextVar("assistant_run_control", default=None)
+_unlimited = RunControl()
+
+
+def current_control():
+    return _control.get() or _unlimited
+
+
+@contextmanager
+def use_control(control):
+    token = _control.set(control)
+    try:
+        yield control
+    finally:
+        _control.reset(token)
+
+
+def fetch_timeout(default):
+    return current_control().timeout(default)
+
+
+def interruptible_sleep(seconds):
+    current_control().sleep(seconds)
+
+
+def stop_reason():
+    return current_control().stop_reason()
+
+
+def stop_if_run_over(retry_state):
+    """tenacity stop condition: give up retrying once the run is cancelled or out of time."""
+    return stop_reason() is not None
@@ -0,0 +1,88 @@
+# core/scrape_state.py - Per-URL state for incremental (change-detection) scraping
+#
+# One JSON file per start URL keeps:
+#   pages: page_url -> content hash, item keys, extracted rows and followed links,
+#          so a page whose HTML did not change is not parsed again
+#   items: item identity (e.g. title) -> fingerprint of its extracted fields + row,
+#          so a run can emit only inserted / updated / removed rows. Repeated
+#          identities get their occurrence number appended ("title\x1f#2"), so
+#          two listings with the same title are tracked separately.
+
+import hashlib
+import json
+import os
+
+from core.frontier import normalize_url, url_key
+
+# Row columns that describe where an item was seen, not what it is
+LOCATION_FIELDS = ("page", "url")
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=16).hexdigest()
+
+
+def row_fingerprint(row):
+    fields = {k: v for k, v in row.items() if k not in LOCATION_FIELDS}
+    return content_hash(json.dumps(fields, sort_keys=True, default=str))
+
+
+class ScrapeState:
+    def __init__(self, start_url, signature, state_dir=os.path.join("state", "web_scraper")):
+        self.path = os.path.join(state_dir, f"{url_key(normalize_url(start_url) or start_url):016x}.json")
+        self.signature = signature
+        self.previous = {"pages": {}, "items": {}}
+        self.pages = {}
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+            # Selectors / filters changed: cached rows no longer mean the same thing
+            if stored.get("signature") == signature:
+                self.previous = stored
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def has_history(self):
+        return bool(self.previous["items"])
+
+    def cached_page(self, page_url, digest):
+        page = self.previous["pages"].get(page_url)
+        if page and page["hash"] == digest:
+            self.pages[page_url] = page
+            return page
+        return None
+
+    def store_page(self, page_url, digest, entries, links):
+        self.pages[page_url] = {"hash": digest, "entries": entries, "links": links}
+
+    def diff(self, rows, key_fields=("title",)):
+        """Returns (changes, items, duplicates): change rows vs. the previous run, the new
+        item map, and how many rows repeated an identity already seen in this run."""
+        old_items = self.previous["items"]
+        items, changes, seen = {}, [], {}
+        duplicates = 0
+        for row in rows:
+            identity = "\x1f".join(str(row.get(k, "")) for k in key_fields)
+            seen[identity] = seen.get(identity, 0) + 1
+            if seen[identity] > 1:
+                duplicates += 1
+                identity = f"{identity}\x1f#{seen[identity]}"
+            items[identity] = {"fp": row_fingerprint(row), "row": row}
+        for identity, item in items.items():
+            old = old_items.get(identity)
+            if old is None:
+                changes.append({"change": "inserted", **item["row"]})
+            elif old["fp"] != item["fp"]:
+                changes.append({"change": "updated", **item["row"]})
+        for identity, old in old_items.items():
+            if identity not in items:
+                changes.append({"change": "removed", **old["row"]})
+        return changes, items, duplicates
+
+    def save(self, items):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"signature": self.signature, "pages": self.pages, "items": items}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,274 @@
+# core/worker_pool.py - Warm process pool for CPU-heavy assistants
+#
+# Assistants listed in ASSISTANT_POOL_TASKS (or configs with "execution": "process")
+# are dispatched by runner.run_assistant to pre-started worker processes that
+# already have pandas, bs4 and the assistant modules imported. Each run gets a
+# wall-clock timeout with hard kill and an RSS cap, and workers are recycled
+# after a fixed number of runs, so a runaway parse fails in isolation instead of
+# pinning the API's GIL or OOM-ing the server.
+#
+# Environment settings:
+#   ASSISTANT_POOL_TASKS       comma-separated task types to run in the pool ("" = none)
+#   ASSISTANT_POOL_WORKERS     number of worker processes (default: CPU count)
+#   ASSISTANT_POOL_TIMEOUT     per-run timeout in seconds (default: 300)
+#   ASSISTANT_POOL_MAX_RSS_MB  kill a worker whose RSS exceeds this (default: 1024, 0 = off)
+#   ASSISTANT_POOL_MAX_RUNS    recycle a worker after this many runs (default: 50)
+
+import atexit
+import importlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from core.progress import current_reporter, use_reporter
+from core.run_control import RunControl, current_control, use_control
+
+DEFAULT_PRELOAD = ["pandas", "bs4"]
+# Extra time a run gets past its deadline to stop cooperatively before a hard kill
+DEADLINE_GRACE_SECONDS = 5
+
+
+def execute_assistant(task_type, config):
+    """Imports assistants.<task_type> and calls run(config).
+
+    Returns (ok, result); ok is False when the assistant could not be loaded or
+    raised, in which case result is the failure dict returned to the caller.
+    """
+    try:
+        module = importlib.import_module(f"assistants.{task_type}")
+    except ImportError as e:
+        return False, {"status": "❌ Failed", "error": f"Assistant '{task_type}' not found: {e}"}
+    if not hasattr(module, "run"):
+        return False, {"status": "❌ Failed", "error": f"Assistant '{task_type}' has no run() function"}
+    try:
+        return True, module.run(config)
+    except Exception as e:
+        print(f"❌ Exception in {task_type}: {e}")
+        return False, {"status": "❌ Failed", "error": str(e)}
+
+
+def _worker_main(conn, preload, cancel_event):
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠️ Worker {os.getpid()} could not preload {name}: {e}")
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        task_type, config = message
+        cancel_event.clear()
+        control = RunControl.from_config(config, cancel_event=cancel_event)
+        # Progress events are relayed to the parent, which forwards them to its reporter
+        with use_control(control), use_reporter(lambda event: conn.send(("progress", event))):
+            ok, result = execute_assistant(task_type, config)
+        try:
+            conn.send(("result", ok, result))
+        except Exception as e:
+            # Result could not be pickled back to the parent
+            conn.send(("result", False, {"status": "❌ Failed", "error": f"Unserializable result: {e}"}))
+    conn.close()
+
+
+def rss_mb(pid):
+    """Resident set size of a process in MB (Linux /proc), or None if unknown."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PoolWorker:
+    def __init__(self, ctx, preload, start_timeout=60):
+        self.conn, child_conn = ctx.Pipe()
+        # Set by the parent when the run is cancelled (DELETE /runs/{run_id})
+        self.cancel_event = ctx.Event()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, preload, self.cancel_event),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+        try:
+            if not self.conn.poll(start_timeout):
+                raise RuntimeError("Pool worker did not start in time")
+            self.conn.recv()  # ("ready", pid)
+        except (EOFError, OSError, RuntimeError) as e:
+            self.kill()
+            raise RuntimeError(f"Pool worker failed to start: {e}")
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        except (OSError, BrokenPipeError):
+            pass
+        self.kill()
+
+
+class ProcessPool:
+    """Fixed-size pool of warm worker processes with per-run timeout and RSS cap."""
+
+    def __init__(self, workers=None, preload=None, timeout=300, max_rss_mb=1024, max_runs=50,
+                 poll_interval=0.1):
+        self.size = workers or os.cpu_count() or 1
+        self.preload = list(preload if preload is not None else DEFAULT_PRELOAD)
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_runs = max_runs
+        self.poll_interval = poll_interval
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.ctx = multiprocessing.get_context(method)
+        if method == "forkserver":
+            # Recycled workers fork from a server that already imported the heavy modules
+            self.ctx.set_forkserver_preload(self.preload)
+        self.idle = queue.Queue()
+        self.workers = []
+        self.lock = threading.Lock()
+        self.counters = {"runs": 0, "timeouts": 0, "memory_kills": 0, "crashes": 0, "recycled": 0}
+        self.closed = False
+        for _ in range(self.size):
+            self._add_worker()
+
+    def _add_worker(self):
+        worker = PoolWorker(self.ctx, self.preload)
+        with self.lock:
+            self.workers.append(worker)
+        self.idle.put(worker)
+
+    def _replace(self, worker, reason):
+        worker.kill()
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+            self.counters[reason] += 1
+        if not self.closed:
+            try:
+                self._add_worker()
+            except Exception as e:
+                print(f"❌ Could not start replacement pool worker: {e}")
+
+    def run(self, task_type, config, timeout=None):
+        """Runs assistants.<task_type>.run(config) in a worker; returns (ok, result)."""
+        if self.closed:
+            raise RuntimeError("Process pool is shut down")
+        timeout = timeout or self.timeout
+        control = current_control()
+        remaining = control.remaining()
+        if remaining is not None:
+            timeout = min(timeout, remaining + DEADLINE_GRACE_SECONDS)
+        worker = self.idle.get()
+        failure = None
+        try:
+            worker.conn.send((task_type, config))
+            deadline = time.monotonic() + timeout
+            reporter = current_reporter()
+            while True:
+                if worker.conn.poll(self.poll_interval):
+                    message = worker.conn.recv()
+                    if message[0] == "result":
+                        _, ok, result = message
+                        break
+                    if reporter:
+                        reporter(message[1])
+                if control.cancelled() and not worker.cancel_event.is_set():
+                    worker.cancel_event.set()
+                # Checked on every wake-up so a chatty run still hits its limits
+                if not worker.alive():
+                    failure = ("crashes", f"Worker process exited with code {worker.process.exitcode}")
+                elif time.monotonic() > deadline:
+                    failure = ("timeouts", f"Run exceeded {timeout}s and was killed")
+                elif self.max_rss_mb and (rss_mb(worker.pid) or 0) > self.max_rss_mb:
+                    failure = ("memory_kills", f"Run exceeded {self.max_rss_mb} MB RSS and was killed")
+                if failure:
+                    break
+        except (EOFError, OSError) as e:
+            failure = ("crashes", f"Worker connection lost: {e}")
+
+        with self.lock:
+            self.counters["runs"] += 1
+        if failure:
+            reason, message = failure
+            print(f"❌ Pool worker {worker.pid} ({task_type}): {message}")
+            self._replace(worker, reason)
+            return False, {"status": "❌ Failed", "error": message}
+
+        worker.runs += 1
+        over_memory = self.max_rss_mb and (rss_mb(worker.pid) or 0) > self.max_rss_mb
+        if worker.runs >= self.max_runs or over_memory:
+            self._replace(worker, "recycled")
+        else:
+            self.idle.put(worker)
+        return ok, result
+
+    def stats(self):
+        with self.lock:
+            workers = [
+                {"pid": w.pid, "runs": w.runs, "alive": w.alive(), "rss_mb": round(rss_mb(w.pid) or 0, 1)}
+                for w in self.workers
+            ]
+            return {"size": self.size, "idle": self.idle.qsize(), "workers": workers, **self.counters}
+
+    def shutdown(self):
+        self.closed = True
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_tasks():
+    return {t.strip() for t in os.getenv("ASSISTANT_POOL_TASKS", "").split(",") if t.strip()}
+
+
+def use_pool(config):
+    mode = config.get("execution")
+    if mode == "inline":
+        return False
+    return mode == "process" or config.get("task_type") in pool_tasks()
+
+
+def get_pool():
+    """Lazily starts the shared pool from the ASSISTANT_POOL_* environment settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            preload = DEFAULT_PRELOAD + [f"assistants.{t}" for t in sorted(pool_tasks())]
+            _pool = ProcessPool(
+                workers=int(os.getenv("ASSISTANT_POOL_WORKERS", "0")) or None,
+                preload=preload,
+                timeout=float(os.getenv("ASSISTANT_POOL_TIMEOUT", "300")),
+                max_rss_mb=float(os.getenv("ASSISTANT_POOL_MAX_RSS_MB", "1024")),
+                max_runs=int(os.getenv("ASSISTANT_POOL_MAX_RUNS", "50")),
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def pool_stats():
+    return _pool.stats() if _pool else None
@@ -1,9 +1,10 @@
 import streamlit as st
 import json
 import os
-import requests
 from datetime import datetime
 
+from core.run_client import get_run, stream_events, submit_run
+
 st.set_page_config(page_title="🔗 Modular Assistant Chainer (SPG)", layout="wide")
 st.title("🔗 Modular Assistant Chainer")
 st.subheader("🧠 Assistant Chain")
@@ -43,24 +44,36 @@ if st.button("🚀 Run Assistant Chain") and len(configs) == num_assistants:
             json.dump(config, f, indent=2)
 
         try:
-            response = requests.post("http://localhost:8000/run-assistant", json=config)
-            if response.status_code == 200:
-                result = response.json()
-                output = result.get("output")
-                st.success(f"✅ Assistant {idx+1} ({assistant}) completed.")
-                st.json(result)
+            run = submit_run(config)
+            status = st.status(f"⏳ Assistant {idx+1} ({assistant}) running...", expanded=True)
+            progress_line = status.empty()
+            for event_type, event in stream_events(run["run_id"]):
+                if event_type == "progress" and event.get("stage") == "error":
+                    status.error(f"❌ {event.get('error')}")
+                elif event_type == "progress":
+                    details = " · ".join(f"{k}: {event[k]}" for k in ("pages_fetched", "rows_emitted") if k in event)
+                    progress_line.markdown(f"**{event.get('stage')}** {details}")
+            record = get_run(run["run_id"])
+
+            if record.get("state") == "succeeded":
+                result = record.get("result")
+                output = result.get("output") if isinstance(result, dict) else result
+                status.update(label=f"✅ Assistant {idx+1} ({assistant}) completed.", state="complete", expanded=False)
+                st.json(record)
 
                 output_file = f"chained_output_{assistant}_{timestamp}.json"
                 with open(os.path.join(OUTPUT_DIR, output_file), "w") as f:
-                    json.dump(result, f, indent=2)
+                    json.dump(record, f, indent=2)
 
                 metadata.append({
                     "assistant": assistant,
+                    "run_id": run["run_id"],
                     "output_file": output_file,
                     "timestamp": timestamp
                 })
             else:
-                st.error(f"❌ Assistant {idx+1} failed: {response.text}")
+                status.update(label=f"❌ Assistant {idx+1} ({assistant}) failed.", state="error")
+                st.error(f"❌ Assistant {idx+1} failed: {record.get('result')}")
                 break
         except Exception as e:
             st.error(f"❌ Error running assistant {idx+1}: {e}")
@@ -4,7 +4,8 @@ import os
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
-import importlib.util
+
+from core.run_client import get_run, stream_events, submit_run
 
 st.set_page_config(page_title="🕸️ Web Scraper Assistant", layout="wide")
 st.title("🕸️ Modular Web Scraper Assistant (SPG v1)")
@@ -17,24 +18,21 @@ if def_config_path.exists():
         default_config = json.load(f)
         st.sidebar.success("✅ Test config loaded")
 
-# Load scraper logic
-scraper_path = Path("assistants/web_scraper.py")
-if scraper_path.exists():
-    spec = importlib.util.spec_from_file_location("web_scraper", scraper_path)
-    web_scraper = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(web_scraper)
-else:
-    st.error("❌ assistants/web_scraper.py not found")
-    st.stop()
-
 # ----------- UI Controls (10+ Modular Sections) -----------
 st.subheader("📋 Configuration")
 
 url = st.text_input("🔗 Target URL", value=default_config.get("url", "https://books.toscrape.com/"))
 prompt = st.text_input("🧠 Prompt Description", value=default_config.get("prompt", "Scrape books"))
-filters = st.text_input("🔍 Filter Keywords (comma-separated)", value=default_config.get("filters", ""))
+filters = st.text_input("🔍 Filters (e.g. laptop, price < 1000 and rating >= 4)", value=default_config.get("filters", ""))
 pages = st.slider("🧭 Pages to Crawl", 1, 10, value=default_config.get("pages", 1))
-use_browser = st.checkbox("🧠 Use Headless Browser (JS Rendering)?", value=default_config.get("use_browser", False))
+crawl = st.checkbox("🕸️ Crawl Mode (follow next links instead of ?page=N)", value=default_config.get("crawl", False))
+next_selector = st.text_input("➡️ Next-Link Selector (crawl mode)", value=default_config.get("next_selector", ""))
+incremental = st.checkbox("🔁 Incremental (emit only new / changed / removed rows)", value=default_config.get("incremental", False))
+browser_modes = {"Off (plain HTTP)": False, "Auto (render only when items are missing)": "auto", "Always": True}
+browser_default = default_config.get("use_browser", False)
+browser_index = list(browser_modes.values()).index(browser_default) if browser_default in browser_modes.values() else 0
+use_browser = browser_modes[st.selectbox("🧠 Headless Browser (JS Rendering)", list(browser_modes), index=browser_index)]
+deadline_seconds = st.number_input("⏱️ Run Deadline (seconds, 0 = none)", min_value=0, value=int(default_config.get("deadline_seconds", 0)))
 callback_url = st.text_input("📡 Webhook Callback URL", value=default_config.get("callback_url", ""))
 
 # 🧪 Selector Upload
@@ -58,19 +56,57 @@ if st.button("🚀 Run Web Scraper"):
         "prompt": prompt,
         "filters": filters,
         "pages": pages,
+        "crawl": crawl,
+        "next_selector": next_selector,
+        "max_pages": pages,
+        "incremental": incremental,
+        "snapshot": incremental,
         "use_browser": use_browser,
         "selectors": selectors_path,
         "callback_url": callback_url,
+        "deadline_seconds": deadline_seconds,
         "timestamp": datetime.now().isoformat(),
         "note": meta_note
     }
-    result = web_scraper.run_web_scraper(config)
+    # Run on the backend and follow its progress stream live
+    try:
+        run = submit_run(config)
+    except Exception as e:
+        st.error(f"❌ Failed to reach assistant API: {e}")
+        st.stop()
+
+    run_id = run["run_id"]
+    status = st.status(f"⏳ Running web scraper (run `{run_id}`)", expanded=True)
+    progress_line = status.empty()
+    try:
+        for event_type, event in stream_events(run_id):
+            if event_type == "dropped":
+                status.caption(f"… {event['dropped']} earlier events skipped")
+            elif event_type == "progress":
+                if event.get("stage") == "error":
+                    status.error(f"❌ {event.get('error')}")
+                else:
+                    progress_line.markdown(
+                        f"**{event.get('stage')}** · pages fetched: {event.get('pages_fetched', 0)}"
+                        f" · rows: {event.get('rows_emitted', 0)}"
+                    )
+        record = get_run(run_id)
+    except Exception as e:
+        status.update(label=f"⚠️ Lost connection to run `{run_id}`", state="error")
+        st.error(f"❌ {e}")
+        st.stop()
+
+    result = record.get("result") or {}
+    failed = record.get("state") == "failed"
+    status.update(label=f"{'❌' if failed else '✅'} Run `{run_id}` {record.get('state')}",
+                  state="error" if failed else "complete", expanded=False)
     st.subheader("📤 Assistant Output")
     st.json(result)
 
-    if result.get("output") and os.path.exists(result["output"]):
+    output_path = result.get("output") or result.get("output_file")
+    if output_path and os.path.exists(output_path):
         try:
-            df = pd.read_csv(result["output"])
+            df = pd.read_csv(output_path)
             st.dataframe(df.head())
         except Exception as e:
             st.warning(f"⚠️ Could not load CSV: {e}")
@@ -2,25 +2,57 @@ import streamlit as st
 st.set_page_config(layout="wide", page_title="🧠 Smart Assistant Launcher")
 
 import os
-import json
-import uuid
+import hashlib
 from datetime import datetime
 import requests  # ✅ Added this import
 
-from pathlib import Path
-from runner import run_assistant
+import pandas as pd
+
+# Runs execute on the FastAPI backend; the launcher only submits and polls
+BACKEND_URL = os.getenv("ASSISTANT_API_URL", "http://localhost:8000").rstrip("/")
+ASSISTANT_FOLDER = "assistants"
+OUTPUT_DIR = "output"
+POLL_SECONDS = 2
+
+
+def dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+# Cached by directory / file mtime, so reruns skip disk I/O until something changes
+@st.cache_data(show_spinner=False)
+def list_assistants(folder, mtime):
+    return sorted(f[:-3] for f in os.listdir(folder) if f.endswith(".py") and not f.startswith("__"))
+
+
+@st.cache_data(show_spinner=False)
+def list_output_csvs(folder, mtime):
+    return sorted(f for f in os.listdir(folder) if f.endswith(".csv")) if os.path.isdir(folder) else []
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_preview(path, mtime):
+    return pd.read_csv(path)
+
 
 # Sidebar - Upload section
 st.sidebar.header("📂 Upload Google Credentials")
 client_secret = st.sidebar.file_uploader("Upload your Google Drive service account JSON", type="json")
 if client_secret:
-    with open("client_secret.json", "wb") as f:
-        f.write(client_secret.read())
+    secret_bytes = client_secret.getvalue()
+    digest = hashlib.sha256(secret_bytes).hexdigest()
+    # Only write when a different file is uploaded, not on every rerun
+    if st.session_state.get("client_secret_digest") != digest:
+        with open("client_secret.json", "wb") as f:
+            f.write(secret_bytes)
+        st.session_state["client_secret_digest"] = digest
     st.sidebar.success("✅ Credentials file saved")
 
 # Load available assistants
-ASSISTANT_FOLDER = "assistants"
-available_assistants = [f.replace(".py", "") for f in os.listdir(ASSISTANT_FOLDER) if f.endswith(".py")]
+available_assistants = list_assistants(ASSISTANT_FOLDER, dir_mtime(ASSISTANT_FOLDER))
 
 # Select assistant from dropdown
 st.header("🧠 Smart Assistant Launcher")
@@ -47,31 +79,59 @@ if st.button("🚀 Save & Run Assistant"):
         "timestamp": datetime.now().isoformat()
     }
 
-    # Save config locally
-    config_name = f"assistant_config_{selected_assistant}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    os.makedirs("config", exist_ok=True)
-    with open(os.path.join("config", config_name), "w") as f:
-        json.dump(config, f, indent=4)
-
-    # Try to run assistant
+    # Submit to the backend (it saves the config) and return immediately
     try:
-        result = run_assistant(config)
-        st.success("✅ Assistant triggered successfully!")
-        st.json(result)
+        res = requests.post(f"{BACKEND_URL}/runs", json=config, timeout=10)
+        if res.status_code == 422:
+            # Rejected by the assistant's config schema before anything ran
+            for error in res.json().get("errors", []):
+                st.error(f"❌ {'.'.join(map(str, error.get('loc', []))) or 'config'}: {error.get('msg')}")
+        else:
+            res.raise_for_status()
+            run = res.json()
+            st.session_state.setdefault("runs", []).insert(0, run["run_id"])
+            st.success(f"✅ Assistant submitted (run `{run['run_id']}`)")
     except Exception as e:
         st.error(f"❌ Failed to reach assistant API: {e}")
 
+
+def render_runs():
+    run_ids = st.session_state.get("runs", [])[:5]
+    if not run_ids:
+        return
+    st.markdown("### ⏳ Recent Runs")
+    for run_id in run_ids:
+        try:
+            run = requests.get(f"{BACKEND_URL}/runs/{run_id}", timeout=5).json()
+        except Exception as e:
+            st.warning(f"Run `{run_id}`: status unavailable ({e})")
+            continue
+        state = run.get("state", "unknown")
+        icon = {"queued": "🕒", "running": "⚙️", "succeeded": "✅", "failed": "❌", "cancelled": "🛑"}.get(state, "❔")
+        with st.expander(f"{icon} {run.get('task_type')} – {state} – `{run_id}`", expanded=state in ("queued", "running")):
+            if run.get("result") is not None:
+                st.json(run["result"])
+            else:
+                st.caption(f"Submitted {run.get('submitted_at')}")
+
+
+# Poll run status in a fragment so only this block reruns
+if hasattr(st, "fragment"):
+    st.fragment(run_every=POLL_SECONDS)(render_runs)()
+else:
+    render_runs()
+    st.button("🔄 Refresh run status")
+
 # Preview latest CSV from output
 st.markdown("### 📄 Latest Output Preview")
-OUTPUT_DIR = "output"
 latest_file = ""
-output_files = sorted([f for f in os.listdir(OUTPUT_DIR) if f.endswith(".csv")])
+output_files = list_output_csvs(OUTPUT_DIR, dir_mtime(OUTPUT_DIR))
 if output_files:
     latest_file = output_files[-1]
     st.markdown(f"📎 Showing latest output file: `{latest_file}`")
     try:
-        import pandas as pd
-        df = pd.read_csv(os.path.join(OUTPUT_DIR, latest_file))
+        latest_path = os.path.join(OUTPUT_DIR, latest_file)
+        df = load_preview(latest_path, dir_mtime(latest_path))
         st.dataframe(df)
     except Exception as e:
         st.warning(f"{latest_file} is empty or malformed – no preview available.")
@@ -89,4 +149,4 @@ if selected_assistant and output_files:
     st.info(f"No outputs found yet for assistant `{selected_assistant}`.")
 
     st.markdown("### 🧠 Run History & Bundled Exports")
-    st.info("No run history available yet.") 
+    st.info("No run history available yet.")
@@ -0,0 +1,23 @@
+import pytest
+from pydantic import ValidationError
+
+from core.config_models import validate_config
+
+
+def test_null_optional_keys_are_left_out_of_the_config():
+    config = validate_config({
+        "task_type": "web_scraper", "url": "https://example.com",
+        "priority": None, "max_attempts": None, "max_pages": None, "deadline_seconds": None,
+    }).to_config()
+    assert not {"priority", "max_attempts", "max_pages", "deadline_seconds"} & config.keys()
+    assert config["url"] == "https://example.com"
+
+
+def test_saved_deadline_at_is_dropped():
+    config = validate_config({"task_type": "api_fetcher", "url": "https://example.com", "deadline_at": 1.0}).to_config()
+    assert "deadline_at" not in config
+
+
+def test_unknown_task_type_is_rejected():
+    with pytest.raises(ValidationError):
+        validate_config({"task_type": "nope"})
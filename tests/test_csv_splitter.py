@@ -0,0 +1,61 @@
+import csv
+import gzip
+import io
+import json
+import threading
+
+from assistants import csv_splitter
+
+CSV = (
+    b'id,name,notes\n'
+    b'1,alpha,"line one\nline two"\n'
+    b'2,beta,"says ""hi""\nand, bye"\n'
+    b'3,gamma,plain\n'
+)
+
+
+def test_iter_records_keeps_quoted_newlines_in_one_record():
+    records = list(csv_splitter.iter_records(io.BytesIO(CSV)))
+    assert records == [
+        b'id,name,notes\n',
+        b'1,alpha,"line one\nline two"\n',
+        b'2,beta,"says ""hi""\nand, bye"\n',
+        b'3,gamma,plain\n',
+    ]
+
+
+def test_split_rows_keeps_multiline_records_intact(tmp_path):
+    source = tmp_path / "in.csv"
+    source.write_bytes(CSV)
+    result = csv_splitter.run({"input_file": str(source), "rows_per_shard": 1, "output_dir": str(tmp_path / "out")})
+    assert result["status"] == "✅ Success", result
+    assert result["rows"] == 3 and result["shards"] == 3
+
+    rows = []
+    for path in result["outputs"]:
+        with open(path, newline="") as f:
+            shard = list(csv.reader(f))
+        assert shard[0] == ["id", "name", "notes"]
+        rows.extend(shard[1:])
+    assert rows == [["1", "alpha", "line one\nline two"], ["2", "beta", 'says "hi"\nand, bye'], ["3", "gamma", "plain"]]
+
+    manifest = json.loads((tmp_path / "out" / "manifest.json").read_text())
+    assert [s["rows"] for s in manifest["shards"]] == [1, 1, 1]
+
+
+def test_failed_final_flush_reports_error_instead_of_hanging(tmp_path, monkeypatch):
+    source = tmp_path / "in.csv"
+    source.write_bytes(CSV)
+
+    def disk_full(self):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(gzip.GzipFile, "close", disk_full)
+    outcome = {}
+    config = {"input_file": str(source), "gzip": True, "output_dir": str(tmp_path / "out")}
+    worker = threading.Thread(target=lambda: outcome.update(result=csv_splitter.run(config)), daemon=True)
+    worker.start()
+    worker.join(10)
+    assert not worker.is_alive(), "csv_splitter.run hung after a failed final write"
+    assert outcome["result"]["status"] == "❌ Failed"
+    assert "No space left" in outcome["result"]["error"]
@@ -0,0 +1,75 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from assistants.web_scraper import extract_page
+from core.filters import FilterSyntaxError, compile_filter
+
+FIELDS = {"title", "price", "rating"}
+SELECTORS = {"item": "div.product", "title": ".title", "price": ".price", "rating": ".rating"}
+
+
+def matches(text, title, price="$10", rating="4"):
+    values = {"title": title, "price": price, "rating": rating}
+    return compile_filter(text, FIELDS).accepts(values.get)
+
+
+@pytest.mark.parametrize("text, title", [
+    ("2-in-1", "Acme 2-in-1 Convertible"),
+    ("men's shoes", "Classic Men's Shoes"),
+    ("wow!", "Wow! Deal"),
+    ("laptop, dell", "Dell Gaming Laptop"),
+    ("rtx 4090", "Beast RTX 4090 Rig"),
+])
+def test_plain_keywords_match_title_substrings(text, title):
+    assert matches(text, title)
+
+
+@pytest.mark.parametrize("text", ["2-in-1", "men's shoes", "wow!", "laptop, dell"])
+def test_plain_keywords_reject_other_titles(text):
+    assert not matches(text, "Basic Desktop Tower")
+
+
+def test_known_field_name_means_present():
+    assert matches("price, rating", "Anything")
+    assert not matches("rating", "Anything", rating="")
+
+
+def test_bare_phrase_inside_expression_keeps_source_text():
+    assert matches("2-in-1 and price < 20", "Acme 2-in-1")
+    assert not matches("2-in-1 and price < 5", "Acme 2-in-1")
+
+
+def test_expressions():
+    assert matches('(dell or hp) and not refurbished, price < 500', "HP Envy")
+    assert not matches('(dell or hp) and not refurbished', "HP Envy Refurbished")
+    assert matches("title ~ /rtx ?40[0-9]0/i", "rtx4070 box")
+    assert matches("rating >= 4", "x", rating="4.5")
+    assert not matches("rating >= 4", "x", rating="")
+
+
+@pytest.mark.parametrize("text", ["price <", "title ~ /(/", "colour contains red", "(dell"])
+def test_bad_expressions_raise(text):
+    with pytest.raises(FilterSyntaxError):
+        compile_filter(text, FIELDS)
+
+
+def test_empty_filter_accepts_everything():
+    assert not compile_filter("", FIELDS)
+    assert compile_filter("  ", FIELDS).accepts({}.get)
+
+
+def test_extract_page_skips_fields_of_rejected_items():
+    html = "".join(
+        f'<div class="product"><span class="title">{t}</span><span class="price">{p}</span></div>'
+        for t, p in [("Dell 2-in-1", "$300"), ("HP Laptop", "$900"), ("Dell Desktop", "$1,200")]
+    )
+    entries = extract_page(BeautifulSoup(html, "html.parser"), SELECTORS, compile_filter("dell, price < 1000", FIELDS))
+    rows = [row for _, row in entries]
+    assert rows[0] == {"title": "Dell 2-in-1", "price": 300.0}
+    assert rows[1] is None and rows[2] is None
+
+
+def test_extract_page_parses_thousands_separators_like_the_filter():
+    html = '<div class="product"><span class="title">Dell XPS</span><span class="price">$1,299.99</span></div>'
+    entries = extract_page(BeautifulSoup(html, "html.parser"), SELECTORS, compile_filter("price > 1000", FIELDS))
+    assert entries[0][1] == {"title": "Dell XPS", "price": 1299.99}
@@ -0,0 +1,151 @@
+import json
+import os
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from core import retention
+
+POLICY = {"default": {"keep_last": 2, "max_age_days": 14, "max_files": 200, "max_bytes": 10**9}}
+NOW = time.time()
+
+
+def write(root, rel, text="a,b\n1,2\n", age_days=30):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    old = NOW - age_days * 86400
+    os.utime(path, (old, old))
+    return path
+
+
+def stamp(days_ago):
+    return (datetime.fromtimestamp(NOW) - timedelta(days=days_ago)).strftime("%Y%m%d_%H%M%S")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "assistants").mkdir()
+    for name in ("web_scraper", "api_fetcher", "csv_splitter"):
+        (tmp_path / "assistants" / f"{name}.py").write_text("def run(config):\n    pass\n")
+    return tmp_path
+
+
+def test_per_assistant_output_folders_are_scanned(tree):
+    for days in (20, 25, 30):
+        write(tree, f"output/api_fetcher/api_fetcher_{stamp(days)}.csv", age_days=days)
+    write(tree, f"output/csv_splitter/big_{stamp(40)}/big_part00000.csv", age_days=40)
+    write(tree, "output/api_fetcher/history.json", "[]", age_days=60)
+    write(tree, "output/api_fetcher/history.json.lock", "", age_days=60)
+
+    candidates = retention.scan_artifacts(str(tree))
+    paths = {os.path.relpath(c["path"], tree) for c in candidates}
+    assert f"output/csv_splitter/big_{stamp(40)}" in paths
+    assert not any("history.json" in p for p in paths)
+    assert {c["assistant"] for c in candidates} == {"api_fetcher", "csv_splitter"}
+
+
+def test_keep_last_counts_runs_not_files(tree):
+    # Three scraper runs, each a CSV plus its summary
+    for days in (20, 25, 30):
+        write(tree, f"output/web_scraper_output_{stamp(days)}.csv", age_days=days)
+        write(tree, f"output/web_scraper_output_{stamp(days)}_summary.md", "## x", age_days=days)
+
+    _, retire = retention.plan_retention(retention.scan_artifacts(str(tree)), POLICY, NOW)
+    retired = sorted(os.path.basename(r["path"]) for r in retire)
+    assert retired == [f"web_scraper_output_{stamp(30)}.csv", f"web_scraper_output_{stamp(30)}_summary.md"]
+
+
+def test_recent_files_are_never_retired(tree):
+    for days in (20, 25, 30):
+        write(tree, f"output/api_fetcher/api_fetcher_{stamp(days)}.csv", age_days=0)
+    _, retire = retention.plan_retention(retention.scan_artifacts(str(tree)), POLICY, NOW)
+    assert retire == []
+
+
+def test_dry_run_changes_nothing(tree):
+    for days in (20, 25, 30, 35):
+        write(tree, f"output/api_fetcher/api_fetcher_{stamp(days)}.csv", age_days=days)
+    before = sorted(p for p in tree.rglob("*"))
+    report = retention.run_retention(str(tree), POLICY, dry_run=True, now=NOW)
+    assert len(report["actions"]) == 2
+    assert sorted(p for p in tree.rglob("*")) == before
+
+
+def test_apply_compacts_rolls_and_removes(tree):
+    for days in (20, 25, 30, 35):
+        write(tree, f"output/api_fetcher/api_fetcher_{stamp(days)}.csv", age_days=days)
+    write(tree, f"output/csv_splitter/big_{stamp(40)}/big_part00000.csv.gz", "gz", age_days=40)
+    write(tree, f"output/csv_splitter/big_{stamp(41)}/big_part00000.csv.gz", "gz", age_days=41)
+    write(tree, f"output/csv_splitter/big_{stamp(42)}/manifest.json", "{}", age_days=42)
+    for days in (48, 49, 50):
+        write(tree, f"config/config_api_fetcher_{stamp(days)}.json", "{}", age_days=days)
+    write(tree, "output/api_fetcher/history.json", "[]", age_days=60)
+
+    report = retention.run_retention(str(tree), POLICY, dry_run=False, now=NOW)
+    assert report["status"] == "✅ Success", report
+
+    remaining = sorted(p.name for p in (tree / "output" / "api_fetcher").iterdir())
+    assert remaining == sorted([f"api_fetcher_{stamp(20)}.csv", f"api_fetcher_{stamp(25)}.csv", "history.json"])
+    assert not (tree / "output" / "csv_splitter" / f"big_{stamp(42)}").exists()
+    assert (tree / "output" / "csv_splitter" / f"big_{stamp(40)}").exists()  # keep_last
+
+    if retention.compaction_available():
+        import pyarrow.parquet as pq
+        parts = list((tree / "archive" / "compacted" / "assistant=api_fetcher").rglob("*.parquet"))
+        assert sum(pq.read_metadata(p).num_rows for p in parts) == 2
+
+    index = retention.load_rolled_index(str(tree))
+    assert f"config/config_api_fetcher_{stamp(50)}.json" in index
+    assert retention.read_rolled(f"config/config_api_fetcher_{stamp(50)}.json", str(tree)) == b"{}"
+    assert not list((tree / "archive").glob("*.tmp"))
+
+
+def test_roll_files_keeps_existing_archive_when_interrupted(tree, monkeypatch):
+    first = write(tree, "config/a_20240101_000000.json", "first")
+    item = {"assistant": "other", "kind": "config", "ts": NOW - 86400 * 30}
+    retention.roll_files([("config/a_20240101_000000.json", str(first), item)], str(tree), "20240101_000000")
+    archive = tree / "archive"
+    zip_path = archive / "rolled-20240101_000000.zip"
+    before = zip_path.read_bytes()
+
+    second = write(tree, "config/b_20240102_000000.json", "second")
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(retention, "file_digest", crash)
+    with pytest.raises(OSError):
+        retention.roll_files([("config/b_20240102_000000.json", str(second), item)], str(tree), "20240102_000000")
+
+    assert zip_path.read_bytes() == before
+    assert sorted(p.name for p in archive.iterdir()) == ["rolled-20240101_000000.zip", "rolled_index.json"]
+    assert json.loads((archive / "rolled_index.json").read_text()).keys() == {"config/a_20240101_000000.json"}
+
+
+def test_each_pass_writes_its_own_zip(tree):
+    item = {"assistant": "other", "kind": "config", "ts": NOW - 86400 * 30}
+    first = write(tree, "config/a_20240101_000000.json", "first")
+    retention.roll_files([("config/a_20240101_000000.json", str(first), item)], str(tree), "20240101_000000")
+    before = (tree / "archive" / "rolled-20240101_000000.zip").read_bytes()
+
+    second = write(tree, "config/b_20240102_000000.json", "second")
+    retention.roll_files([("config/b_20240102_000000.json", str(second), item)], str(tree), "20240101_000000")
+
+    # Earlier zips are never rewritten; a clashing stamp gets a suffix
+    assert (tree / "archive" / "rolled-20240101_000000.zip").read_bytes() == before
+    with zipfile.ZipFile(tree / "archive" / "rolled-20240101_000000-2.zip") as zf:
+        assert zf.namelist() == ["config/b_20240102_000000.json"]
+    assert retention.read_rolled("config/a_20240101_000000.json", str(tree)) == b"first"
+    assert retention.read_rolled("config/b_20240102_000000.json", str(tree)) == b"second"
+
+
+def test_files_in_the_legacy_rolled_zip_stay_readable(tree):
+    archive = tree / "archive"
+    archive.mkdir()
+    with zipfile.ZipFile(archive / "rolled.zip", "w") as zf:
+        zf.writestr("config/old.json", "old")
+    (archive / "rolled_index.json").write_text(json.dumps({"config/old.json": {"source": "config/old.json"}}))
+    assert retention.read_rolled("config/old.json", str(tree)) == b"old"
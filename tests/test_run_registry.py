@@ -0,0 +1,24 @@
+import threading
+
+import run_registry
+
+
+def test_queued_runs_survive_eviction(monkeypatch):
+    gate = threading.Event()
+
+    def fake_run(config, control=None):
+        gate.wait(10)
+        return {"status": "✅ Success", "n": config["n"]}
+
+    monkeypatch.setattr(run_registry, "run_assistant", fake_run)
+    registry = run_registry.RunRegistry(max_workers=1, max_tracked=2)
+    run_ids = [registry.submit({"task_type": "stub", "n": n})["run_id"] for n in range(4)]
+
+    # One running and three queued: nothing may be dropped yet
+    assert all(registry.get(rid) is not None for rid in run_ids)
+    gate.set()
+    registry.executor.shutdown(wait=True)
+
+    assert len(registry.runs) == 2
+    assert [registry.get(rid)["result"]["n"] for rid in run_ids[-2:]] == [2, 3]
+    assert set(registry.buffers) == set(registry.controls) == set(run_ids[-2:])
@@ -0,0 +1,25 @@
+from core.scrape_state import ScrapeState
+
+
+def state_after(tmp_path, rows):
+    state = ScrapeState("https://example.com/list", "sig", str(tmp_path))
+    changes, items, duplicates = state.diff(rows)
+    state.save(items)
+    return changes, items, duplicates
+
+
+def test_duplicate_titles_are_tracked_separately(tmp_path):
+    rows = [{"title": "Mouse", "price": 10.0}, {"title": "Mouse", "price": 12.0}, {"title": "Pad", "price": 5.0}]
+    changes, items, duplicates = state_after(tmp_path, rows)
+    assert duplicates == 1
+    assert len(items) == 3
+    assert [c["change"] for c in changes] == ["inserted"] * 3
+
+
+def test_change_to_a_repeated_title_is_reported(tmp_path):
+    state_after(tmp_path, [{"title": "Mouse", "price": 10.0}, {"title": "Mouse", "price": 12.0}])
+    changes, _, _ = state_after(tmp_path, [{"title": "Mouse", "price": 10.0}, {"title": "Mouse", "price": 15.0}])
+    assert changes == [{"change": "updated", "title": "Mouse", "price": 15.0}]
+
+    changes, _, _ = state_after(tmp_path, [{"title": "Mouse", "price": 10.0}])
+    assert changes == [{"change": "removed", "title": "Mouse", "price": 15.0}]